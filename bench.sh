@@ -0,0 +1,4 @@
+for bench in bench/bench_*.py; do
+  echo "$bench"
+  python3 "$bench"
+done
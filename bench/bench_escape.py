@@ -0,0 +1,69 @@
+import os
+import sys
+import tempfile
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import htmlnode
+from corpus import generate_corpus
+from markdown import markdown_to_html_node
+
+PAGES = {"posts": 200, "links": 100, "code": 100}
+
+def unescaped_attribute_to_html(name, value):
+  return f' {name}="{value}"'
+
+def render(markdowns):
+  for source in markdowns:
+    markdown_to_html_node(source).to_html()
+
+def serialize(nodes):
+  for node in nodes:
+    node.to_html()
+
+def without_escaping(function, *args):
+  escape_text = htmlnode.escape_text
+  attribute_to_html = htmlnode.attribute_to_html
+  htmlnode.escape_text = lambda text: text
+  htmlnode.attribute_to_html = unescaped_attribute_to_html
+  try:
+    return function(*args)
+  finally:
+    htmlnode.escape_text = escape_text
+    htmlnode.attribute_to_html = attribute_to_html
+
+def compare(function, *args, repeat=15):
+  # Runs alternate between the two, so drift in machine load hits both alike
+  escaped = []
+  unescaped = []
+  for _ in range(repeat):
+    escaped.append(min(timeit.repeat(lambda: function(*args), number=1, repeat=1)))
+    unescaped.append(without_escaping(lambda: min(timeit.repeat(lambda: function(*args), number=1, repeat=1))))
+  return min(escaped), min(unescaped)
+
+def main():
+  with tempfile.TemporaryDirectory() as tmp:
+    for shape, pages in PAGES.items():
+      markdowns = []
+      for path in generate_corpus(os.path.join(tmp, shape), shape, pages):
+        with open(path, "r") as file:
+          markdowns.append(file.read())
+      nodes = [markdown_to_html_node(source) for source in markdowns]
+
+      render_time, plain_time = compare(render, markdowns)
+      serialize_time, plain_serialize_time = compare(serialize, nodes)
+      overhead = (render_time - plain_time) / plain_time * 100
+      print(f"{shape:>6}: render {render_time * 1000:8.1f}ms, unescaped {plain_time * 1000:8.1f}ms, {overhead:+5.1f}% "
+        f"(to_html {serialize_time * 1000:.1f}ms vs {plain_serialize_time * 1000:.1f}ms)")
+
+  plain = "An ordinary sentence of about the length the renderer usually sees in a paragraph."
+  special = plain + " Fish & chips <cheap>."
+  number = 200000
+  for name, text in [("no special characters", plain), ("special characters", special)]:
+    escape_time = min(timeit.repeat(lambda: htmlnode.escape_text(text), number=number, repeat=5))
+    translate_time = min(timeit.repeat(lambda: text.translate(htmlnode.TEXT_ESCAPES), number=number, repeat=5))
+    print(f"{name:>22}: escape_text {escape_time / number * 1e9:6.0f}ns, translate {translate_time / number * 1e9:6.0f}ns")
+
+if __name__ == "__main__":
+  main()
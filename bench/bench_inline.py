@@ -0,0 +1,109 @@
+import os
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from textnode import TextNode, TextType, text_to_textnodes
+
+PARAGRAPH = (
+  "This is **bold text** with an _italic_ word, some `inline code`, "
+  "an ![image](https://example.com/image.png) and a [link](https://example.com). "
+)
+PROSE = (
+  "Most paragraphs are plain sentences that run on for a while with only the odd "
+  "**strong** word or [reference](https://example.com) somewhere in the middle of them. "
+)
+
+# A copy of the five-pass pipeline text_to_textnodes replaced, kept as the reference
+# both for the output and for the time
+
+def split_pipeline(text):
+  nodes = [TextNode(text, TextType.TEXT)]
+  nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
+  nodes = split_nodes_delimiter(nodes, "_", TextType.ITALIC)
+  nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)
+  nodes = split_nodes_image(nodes)
+  nodes = split_nodes_link(nodes)
+  return nodes
+
+def split_nodes_image(old_nodes):
+  nodes = []
+  for node in old_nodes:
+    if node.text_type != TextType.TEXT:
+      nodes.append(node)
+      continue
+
+    current_text = node.text
+    matches = re.findall(r"\!\[(.*?)\]\((.*?)\)", current_text)
+    if len(matches) == 0:
+      nodes.append(node)
+      continue
+
+    for alt_text, url in matches:
+      sections = current_text.split(f"![{alt_text}]({url})", 1)
+      nodes.append(TextNode(sections[0], TextType.TEXT))
+      nodes.append(TextNode(alt_text, TextType.IMAGES, url))
+      current_text = sections[1]
+
+    if current_text:
+      nodes.append(TextNode(current_text, TextType.TEXT))
+  return nodes
+
+def split_nodes_link(old_nodes):
+  nodes = []
+  for node in old_nodes:
+    if node.text_type != TextType.TEXT:
+      nodes.append(node)
+      continue
+
+    current_text = node.text
+    matches = re.findall(r"\[(.*?)\]\((.*?)\)", current_text)
+    if len(matches) == 0:
+      nodes.append(node)
+      continue
+
+    for link_text, url in matches:
+      sections = current_text.split(f"[{link_text}]({url})", 1)
+      nodes.append(TextNode(sections[0], TextType.TEXT))
+      nodes.append(TextNode(link_text, TextType.LINKS, url))
+      current_text = sections[1]
+
+    if current_text:
+      nodes.append(TextNode(current_text, TextType.TEXT))
+  return nodes
+
+def split_nodes_delimiter(old_nodes, delimiter, text_type):
+  new_nodes = []
+  for old_node in old_nodes:
+    if old_node.text_type != TextType.TEXT:
+      new_nodes.append(old_node)
+      continue
+    sections = old_node.text.split(delimiter)
+    if len(sections) % 2 == 0:
+      raise ValueError("invalid markdown, formatted section not closed")
+    for i in range(len(sections)):
+      if sections[i] == "":
+        continue
+      if i % 2 == 0:
+        new_nodes.append(TextNode(sections[i], TextType.TEXT))
+      else:
+        new_nodes.append(TextNode(sections[i], text_type))
+  return new_nodes
+
+def main():
+  for shape, paragraph in [("markup", PARAGRAPH), ("prose", PROSE)]:
+    for sentences in [1, 10, 100]:
+      text = paragraph * sentences
+      if split_pipeline(text) != text_to_textnodes(text):
+        raise Exception("text_to_textnodes does not match the five-pass pipeline")
+
+      number = max(1, 2000 // sentences)
+      split_time = min(timeit.repeat(lambda: split_pipeline(text), number=number, repeat=7))
+      scan_time = min(timeit.repeat(lambda: text_to_textnodes(text), number=number, repeat=7))
+      span_time = min(timeit.repeat(lambda: text_to_textnodes(text, spans=True), number=number, repeat=7))
+      print(f"{shape:>6} {sentences:>4} sentences: five passes {split_time / number * 1e6:9.1f}us, one pass {scan_time / number * 1e6:9.1f}us, {split_time / scan_time:.2f}x, spans {span_time / number * 1e6:9.1f}us")
+
+if __name__ == "__main__":
+  main()
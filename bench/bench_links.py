@@ -0,0 +1,42 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from textnode import TextNode, TextType, extract_markdown_links, split_nodes_link, text_to_textnodes
+
+def split_nodes_link_by_split(old_nodes):
+  # The previous implementation: re-split the remaining text once per link
+  nodes = []
+  for node in old_nodes:
+    current_text = node.text
+    for link_text, url in extract_markdown_links(current_text):
+      sections = current_text.split(f"[{link_text}]({url})", 1)
+      nodes.append(TextNode(sections[0], TextType.TEXT))
+      nodes.append(TextNode(link_text, TextType.LINKS, url))
+      current_text = sections[1]
+    if current_text:
+      nodes.append(TextNode(current_text, TextType.TEXT))
+  return nodes
+
+def timed(function, text):
+  start = time.perf_counter()
+  result = function([TextNode(text, TextType.TEXT)])
+  return time.perf_counter() - start, result
+
+def main():
+  for links in [1000, 2500, 5000, 10000]:
+    text = " ".join(f"[link {i}](https://example.com/pages/{i})" for i in range(links))
+    split_time, expected = timed(split_nodes_link_by_split, text)
+    offset_time, result = timed(split_nodes_link, text)
+    if result != expected:
+      raise Exception("Offset based splitting does not match")
+
+    start = time.perf_counter()
+    text_to_textnodes(text)
+    inline_time = time.perf_counter() - start
+    print(f"{links:>6} links: split {split_time * 1000:8.1f}ms ({split_time / links * 1e6:5.2f}us/link), offsets {offset_time * 1000:6.1f}ms ({offset_time / links * 1e6:5.2f}us/link), text_to_textnodes {inline_time * 1000:6.1f}ms")
+
+if __name__ == "__main__":
+  main()
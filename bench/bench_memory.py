@@ -0,0 +1,68 @@
+import os
+import sys
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from htmlnode import LeafNode
+from markdown import markdown_to_html_node, markdown_lines_to_html_node
+
+BLOCK = """## Section
+
+This is **bold text** with an _italic_ word, some `inline code` and a [link](https://example.com).
+
+* First item with **bold**
+* Second item with _italic_
+* Third item with `code`
+"""
+
+class DictLeafNode():
+  def __init__(self, tag, value, props=None):
+    self.tag = tag
+    self.value = value
+    self.children = None
+    self.props = props
+
+def bytes_per_node(factory, count):
+  tracemalloc.start()
+  before = tracemalloc.get_traced_memory()[0]
+  nodes = [factory(None, str(i)) for i in range(count)]
+  after = tracemalloc.get_traced_memory()[0]
+  tracemalloc.stop()
+  # Subtract the value strings and the list itself, which both variants share
+  shared = sum(sys.getsizeof(node.value) for node in nodes) + sys.getsizeof(nodes)
+  return (after - before - shared) / count
+
+def peak_render(markdown):
+  tracemalloc.start()
+  node = markdown_to_html_node(markdown)
+  node.to_html()
+  peak = tracemalloc.get_traced_memory()[1]
+  tracemalloc.stop()
+  return peak
+
+def peak_stream(path):
+  tracemalloc.start()
+  with open(path, "r") as file, open(os.devnull, "w") as sink:
+    markdown_lines_to_html_node(file).write_html(sink)
+  peak = tracemalloc.get_traced_memory()[1]
+  tracemalloc.stop()
+  return peak
+
+def main():
+  count = 100000
+  print(f"__dict__ leaf node: {bytes_per_node(DictLeafNode, count):6.1f} bytes")
+  print(f"slotted LeafNode:   {bytes_per_node(LeafNode, count):6.1f} bytes")
+
+  markdown = "# Large document\n\n" + "\n".join([BLOCK] * 2000)
+  print(f"peak memory rendering {len(markdown) / 1e6:.1f}MB of markdown: {peak_render(markdown) / 1e6:.1f}MB")
+
+  with tempfile.TemporaryDirectory() as tmp:
+    path = os.path.join(tmp, "large.md")
+    with open(path, "w") as file:
+      file.write(markdown * 10)
+    print(f"peak memory streaming {len(markdown) * 10 / 1e6:.1f}MB of markdown from disk: {peak_stream(path) / 1e6:.1f}MB")
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,153 @@
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import markdown
+from corpus import SHAPES, generate_corpus
+from main import extract_title
+from markdown import markdown_to_blocks, block_to_block_type, markdown_to_html_node
+from template import compile_template
+from textnode import text_to_textnodes
+
+TEMPLATE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "template.html")
+DEFAULT_PAGES = {"posts": 500, "huge": 3, "lists": 200, "code": 200, "links": 200}
+
+def timed(function, items):
+  start = time.perf_counter()
+  results = [function(item) for item in items]
+  return time.perf_counter() - start, results
+
+def collect_inline_texts(markdowns):
+  # Record exactly what the block renderers hand to the inline parser
+  texts = []
+  original = markdown.text_to_textnodes
+  markdown.text_to_textnodes = lambda text: texts.append(text) or original(text)
+  try:
+    for source in markdowns:
+      markdown_to_html_node(source)
+  finally:
+    markdown.text_to_textnodes = original
+  return texts
+
+def run_shape(shape, pages, seed):
+  with tempfile.TemporaryDirectory() as tmp:
+    paths = generate_corpus(os.path.join(tmp, "content"), shape, pages, seed)
+    out_dir = os.path.join(tmp, "public")
+    dest_paths = [os.path.join(out_dir, f"{i}.html") for i in range(len(paths))]
+    os.makedirs(out_dir)
+    with open(TEMPLATE_PATH, "r") as file:
+      template_text = file.read()
+
+    def read(path):
+      with open(path, "r") as file:
+        return file.read()
+
+    stages = {}
+    stages["read"], markdowns = timed(read, paths)
+    stages["markdown_to_blocks"], page_blocks = timed(markdown_to_blocks, markdowns)
+    blocks = [block for blocks in page_blocks for block in blocks]
+    stages["block_to_block_type"], _ = timed(block_to_block_type, blocks)
+    inline_texts = collect_inline_texts(markdowns)
+    stages["text_to_textnodes"], _ = timed(text_to_textnodes, inline_texts)
+    stages["markdown_to_html_node"], nodes = timed(markdown_to_html_node, markdowns)
+    stages["to_html"], contents = timed(lambda node: node.to_html(), nodes)
+
+    template = compile_template(template_text)
+    fill = lambda item: template.render({"Title": extract_title(item[0]), "Content": item[1]})
+    stages["template"], htmls = timed(fill, list(zip(markdowns, contents)))
+
+    def write(item):
+      with open(item[0], "w") as file:
+        file.write(item[1])
+    stages["write"], _ = timed(write, list(zip(dest_paths, htmls)))
+
+    tracemalloc.start()
+    for source in markdowns:
+      markdown_to_html_node(source).to_html()
+    peak_memory = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+  input_bytes = sum(len(source.encode("utf-8")) for source in markdowns)
+  # Blocks and inline parsing are measured on their own and again inside markdown_to_html_node
+  total = stages["read"] + stages["markdown_to_html_node"] + stages["to_html"] + stages["template"] + stages["write"]
+  return {
+    "pages": len(paths),
+    "blocks": len(blocks),
+    "input_bytes": input_bytes,
+    "stages": stages,
+    "total_seconds": total,
+    "pages_per_second": len(paths) / total,
+    "mb_per_second": input_bytes / 1e6 / total,
+    "peak_memory_bytes": peak_memory,
+  }
+
+def git_commit():
+  try:
+    return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+  except (OSError, subprocess.CalledProcessError):
+    return None
+
+def print_result(shape, result):
+  print(f"{shape}: {result['pages']} pages, {result['input_bytes'] / 1e6:.1f}MB, {result['pages_per_second']:.0f} pages/s, {result['mb_per_second']:.2f}MB/s, peak {result['peak_memory_bytes'] / 1e6:.1f}MB")
+  for stage, seconds in result["stages"].items():
+    print(f"  {stage:<22} {seconds * 1000:9.1f}ms")
+
+def compare(results, baseline_path, threshold):
+  with open(baseline_path, "r") as file:
+    baseline = json.load(file)
+
+  regressions = []
+  for shape, result in results.items():
+    previous = baseline["results"].get(shape)
+    if previous == None:
+      continue
+    ratio = result["total_seconds"] / previous["total_seconds"]
+    print(f"{shape}: {ratio:.2f}x the time of {baseline.get('commit')}")
+    if ratio > 1 + threshold:
+      regressions.append(shape)
+
+  return regressions
+
+def main():
+  parser = argparse.ArgumentParser(description="Time each stage of the build on synthetic corpora")
+  parser.add_argument("--shape", choices=SHAPES, action="append", help="corpus shape to run, can be repeated (default: all)")
+  parser.add_argument("--scale", type=float, default=1.0, help="multiply the default page count of every shape")
+  parser.add_argument("--seed", type=int, default=0)
+  parser.add_argument("--output", default="bench_results.json", help="where to save the JSON results")
+  parser.add_argument("--compare", help="earlier results JSON to compare against")
+  parser.add_argument("--threshold", type=float, default=0.1, help="slowdown ratio reported as a regression (default 0.1)")
+  args = parser.parse_args()
+
+  results = {}
+  for shape in args.shape or SHAPES:
+    pages = max(1, int(DEFAULT_PAGES[shape] * args.scale))
+    results[shape] = run_shape(shape, pages, args.seed)
+    print_result(shape, results[shape])
+
+  data = {
+    "commit": git_commit(),
+    "python": platform.python_version(),
+    "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    "results": results,
+  }
+  with open(args.output, "w") as file:
+    json.dump(data, file, indent=2)
+  print(f"Saved results to {args.output}")
+
+  if args.compare:
+    regressions = compare(results, args.compare, args.threshold)
+    if regressions:
+      print(f"Regressions: {', '.join(regressions)}")
+      sys.exit(1)
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,89 @@
+import argparse
+import os
+import random
+
+WORDS = "the ring of power was forged in fire by the dark lord and carried from the shire to the mountain of doom".split()
+
+SHAPES = ["posts", "huge", "lists", "code", "links"]
+
+def sentence(rng, words=12):
+  return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+def inline_sentence(rng):
+  parts = [sentence(rng, 6)]
+  parts.append(f"**{rng.choice(WORDS)} {rng.choice(WORDS)}**")
+  parts.append(f"_{rng.choice(WORDS)}_")
+  parts.append(f"`{rng.choice(WORDS)}()`")
+  parts.append(sentence(rng, 6))
+  return " ".join(parts)
+
+def paragraph(rng, sentences=4):
+  return "\n".join(inline_sentence(rng) for _ in range(sentences))
+
+def unordered_list(rng, items=8):
+  return "\n".join(f"- {inline_sentence(rng)}" for _ in range(items))
+
+def ordered_list(rng, items=8):
+  return "\n".join(f"{i + 1}. {sentence(rng)}" for i in range(items))
+
+def code_block(rng, lines=12):
+  body = "\n".join(f"    {rng.choice(WORDS)}({rng.choice(WORDS)}, {i})" for i in range(lines))
+  return f"```\n{body}\n```"
+
+def quote(rng, lines=3):
+  return "\n".join(f"> {sentence(rng)}" for _ in range(lines))
+
+def link_paragraph(rng, links=20):
+  return " ".join(f"[{rng.choice(WORDS)} {i}](https://example.com/{rng.choice(WORDS)}/{i})" for i in range(links))
+
+def image(rng, i):
+  return f"![{sentence(rng, 3)}](/images/{rng.choice(WORDS)}-{i}.png)"
+
+def page_blocks(rng, shape, blocks):
+  generators = {
+    "posts": [paragraph, paragraph, quote, unordered_list],
+    "huge": [paragraph, unordered_list, ordered_list, code_block, quote, link_paragraph],
+    "lists": [unordered_list, ordered_list, unordered_list],
+    "code": [code_block, code_block, paragraph],
+    "links": [link_paragraph, link_paragraph, paragraph],
+  }[shape]
+
+  for i in range(blocks):
+    if i % 10 == 0:
+      yield f"## {sentence(rng, 4)}"
+    if i % 25 == 0:
+      yield image(rng, i)
+    yield rng.choice(generators)(rng)
+
+def generate_corpus(dest_dir, shape="posts", pages=100, seed=0):
+  if shape not in SHAPES:
+    raise ValueError(f"Unknown corpus shape: {shape}")
+
+  rng = random.Random(seed)
+  blocks = 2000 if shape == "huge" else 12
+  paths = []
+  for i in range(pages):
+    page_dir = os.path.join(dest_dir, "blog", f"{shape}-{i // 100}", f"post-{i}")
+    os.makedirs(page_dir, exist_ok=True)
+    path = os.path.join(page_dir, "index.md")
+    with open(path, "w") as file:
+      file.write(f"# {sentence(rng, 5)}\n\n")
+      file.write("\n\n".join(page_blocks(rng, shape, blocks)))
+      file.write("\n")
+    paths.append(path)
+
+  return paths
+
+def main():
+  parser = argparse.ArgumentParser(description="Generate a synthetic content/ tree for benchmarks")
+  parser.add_argument("dest", help="directory to write the markdown files into")
+  parser.add_argument("--shape", choices=SHAPES, default="posts")
+  parser.add_argument("--pages", type=int, default=100)
+  parser.add_argument("--seed", type=int, default=0)
+  args = parser.parse_args()
+
+  paths = generate_corpus(args.dest, args.shape, args.pages, args.seed)
+  print(f"Generated {len(paths)} pages in {args.dest}")
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,37 @@
+import os
+import shutil
+
+def copy_file(from_path, dest_path, link=False):
+  # Never write into an existing output, it may be a hardlink to the source
+  if os.path.lexists(dest_path):
+    os.remove(dest_path)
+
+  if link:
+    try:
+      os.link(from_path, dest_path)
+      return "link"
+    except OSError:
+      pass
+
+  if hasattr(os, "copy_file_range"):
+    try:
+      copy_file_range(from_path, dest_path)
+      shutil.copymode(from_path, dest_path)
+      return "copy_file_range"
+    except OSError:
+      if os.path.lexists(dest_path):
+        os.remove(dest_path)
+
+  shutil.copy(from_path, dest_path)
+  return "copy"
+
+def copy_file_range(from_path, dest_path):
+  # Lets the kernel copy (or reflink, on filesystems that support it) without
+  # moving the bytes through Python
+  with open(from_path, "rb") as source, open(dest_path, "wb") as dest:
+    remaining = os.fstat(source.fileno()).st_size
+    while remaining > 0:
+      copied = os.copy_file_range(source.fileno(), dest.fileno(), remaining)
+      if copied == 0:
+        break
+      remaining -= copied
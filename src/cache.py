@@ -0,0 +1,121 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+# Part of every key and of the manifest's build options, bumped whenever the renderer's
+# output changes so blocks and pages rendered by an older version are never reused
+RENDER_VERSION = 3
+
+class BlockCache():
+  def __init__(self, max_bytes: int=64 * 2**20, path: str=None, max_disk_bytes: int=256 * 2**20) -> None:
+    self.max_bytes = max_bytes
+    self.path = path
+    self.max_disk_bytes = max_disk_bytes
+    self.entries = OrderedDict()
+    self.size = 0
+    self.connection = None
+    self.hits = 0
+    self.disk_hits = 0
+    self.misses = 0
+    self.evictions = 0
+    # Pipeline render threads share the cache, the lock covers the LRU, the counters and
+    # the one SQLite connection they all use
+    self.lock = threading.RLock()
+
+  def key(self, block):
+    return hashlib.blake2b(f"{RENDER_VERSION}\n{block}".encode("utf-8"), digest_size=16).hexdigest()
+
+  def get(self, block):
+    key = self.key(block)
+    with self.lock:
+      return self.locked_get(key)
+
+  def locked_get(self, key):
+    html = self.entries.get(key)
+    if html != None:
+      self.entries.move_to_end(key)
+      self.hits += 1
+      return html
+
+    html = self.disk_get(key)
+    if html != None:
+      self.disk_hits += 1
+      self.remember(key, html)
+      return html
+
+    self.misses += 1
+    return None
+
+  def put(self, block, html):
+    key = self.key(block)
+    with self.lock:
+      self.remember(key, html)
+      self.disk_put(key, html)
+
+  def remember(self, key, html):
+    if key in self.entries:
+      self.size -= len(self.entries.pop(key))
+    self.entries[key] = html
+    self.size += len(html)
+    while self.size > self.max_bytes and self.entries:
+      _, evicted = self.entries.popitem(last=False)
+      self.size -= len(evicted)
+      self.evictions += 1
+
+  def connect(self):
+    # Opened lazily so a cache created before forking workers never shares a connection
+    if self.connection == None and self.path != None:
+      dir_name = os.path.dirname(self.path)
+      if dir_name and not os.path.exists(dir_name):
+        os.makedirs(dir_name)
+      self.connection = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+      self.connection.execute("PRAGMA journal_mode=WAL")
+      self.connection.execute("PRAGMA synchronous=OFF")
+      self.connection.execute("CREATE TABLE IF NOT EXISTS blocks (key TEXT PRIMARY KEY, html TEXT NOT NULL, size INTEGER NOT NULL, used REAL NOT NULL)")
+    return self.connection
+
+  def disk_get(self, key):
+    connection = self.connect()
+    if connection == None:
+      return None
+    row = connection.execute("SELECT html FROM blocks WHERE key = ?", (key,)).fetchone()
+    if row == None:
+      return None
+    connection.execute("UPDATE blocks SET used = ? WHERE key = ?", (time.time(), key))
+    return row[0]
+
+  def disk_put(self, key, html):
+    connection = self.connect()
+    if connection != None:
+      connection.execute("INSERT OR REPLACE INTO blocks VALUES (?, ?, ?, ?)", (key, html, len(html), time.time()))
+
+  def prune_disk(self):
+    connection = self.connect()
+    if connection == None:
+      return 0
+    total = connection.execute("SELECT COALESCE(SUM(size), 0) FROM blocks").fetchone()[0]
+    removed = 0
+    for key, size in connection.execute("SELECT key, size FROM blocks ORDER BY used").fetchall():
+      if total <= self.max_disk_bytes:
+        break
+      connection.execute("DELETE FROM blocks WHERE key = ?", (key,))
+      total -= size
+      removed += 1
+    return removed
+
+  def close(self):
+    with self.lock:
+      if self.connection != None:
+        self.prune_disk()
+        self.connection.close()
+        self.connection = None
+
+  def __reduce__(self):
+    # Worker processes get an empty cache with the same limits and disk tier
+    return (BlockCache, (self.max_bytes, self.path, self.max_disk_bytes))
+
+  def __repr__(self) -> str:
+    return f"BlockCache({self.hits} hits, {self.disk_hits} disk hits, {self.misses} misses, {self.evictions} evictions, {self.size} bytes)"
@@ -0,0 +1,55 @@
+import sys
+
+from daemon import DAEMON_SOCKET_PATH, DaemonUnavailable, send_request
+
+USAGE = """usage: client.py [build options...]
+       client.py render PATH [--minify]
+       client.py ping | shutdown
+
+Runs the request on the build daemon started with `main.py daemon`, or in this
+process when no daemon is running."""
+
+def main(argv=None):
+  argv = sys.argv[1:] if argv == None else argv
+  if argv[:1] == ["render"]:
+    if len(argv) < 2:
+      print(USAGE, file=sys.stderr)
+      return 2
+    request = {"command": "render", "path": argv[1], "minify": "--minify" in argv[2:]}
+  elif argv[:1] in (["ping"], ["shutdown"]):
+    request = {"command": argv[0]}
+  elif argv[:1] in (["-h"], ["--help"]):
+    print(USAGE)
+    return 0
+  else:
+    request = {"command": "build", "argv": argv}
+
+  try:
+    status, result = send_request(DAEMON_SOCKET_PATH, request, sys.stdout.write)
+  except DaemonUnavailable:
+    if request["command"] in ("ping", "shutdown"):
+      print("No build daemon is running", file=sys.stderr)
+      return 1
+    return run_in_process(request)
+
+  if request["command"] == "render" and status == 0:
+    sys.stdout.write(result["html"])
+  return status
+
+def run_in_process(request):
+  # Only paid for when there is no daemon, the whole point of the client is to avoid it
+  import main as builder
+  try:
+    if request["command"] == "render":
+      sys.stdout.write(builder.render_file(request["path"], request["minify"]))
+    else:
+      builder.main(request["argv"])
+  except SystemExit as e:
+    return e.code if isinstance(e.code, int) else (0 if e.code == None else 1)
+  except Exception as e:
+    print(f"{type(e).__name__}: {e}", file=sys.stderr)
+    return 1
+  return 0
+
+if __name__ == "__main__":
+  sys.exit(main())
@@ -0,0 +1,75 @@
+import gzip
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+  import brotli
+except ImportError:
+  brotli = None
+
+COMPRESSIBLE_EXTENSIONS = {".html", ".css", ".js", ".mjs", ".json", ".map", ".svg", ".xml", ".txt"}
+
+def available_encodings():
+  # Brotli is not in the standard library, .br files are only written when the module is installed
+  return ["gz", "br"] if brotli != None else ["gz"]
+
+def compress_bytes(data, encoding):
+  if encoding == "gz":
+    # A zero mtime keeps the archive identical for identical content
+    return gzip.compress(data, compresslevel=9, mtime=0)
+  if encoding == "br":
+    return brotli.compress(data, quality=11)
+  raise ValueError(f"Unknown encoding: {encoding}")
+
+def compress_file(path, encodings):
+  with open(path, "rb") as file:
+    data = file.read()
+
+  outputs = []
+  for encoding in encodings:
+    output = f"{path}.{encoding}"
+    tmp_path = f"{output}.tmp"
+    with open(tmp_path, "wb") as file:
+      file.write(compress_bytes(data, encoding))
+    os.replace(tmp_path, output)
+    outputs.append(output)
+  return outputs
+
+def iter_compressible(dir_path, min_size):
+  for root, dirs, files in os.walk(dir_path):
+    dirs.sort()
+    for name in sorted(files):
+      if os.path.splitext(name)[1] not in COMPRESSIBLE_EXTENSIONS:
+        continue
+      path = os.path.join(root, name)
+      if os.path.getsize(path) >= min_size:
+        yield path
+
+def compress_outputs(dir_path, manifest=None, jobs=None, min_size=1024, encodings=None):
+  # Writes .gz (and .br) siblings for nginx gzip_static, skipping files whose content is unchanged.
+  # Without jobs every CPU core compresses.
+  if encodings == None:
+    encodings = available_encodings()
+    if "br" not in encodings:
+      print("Warning: brotli is not installed, writing .gz files only (pip install brotli for .br)")
+  if jobs == None:
+    jobs = os.cpu_count() or 1
+  paths = []
+  for path in iter_compressible(dir_path, min_size):
+    outputs = [f"{path}.{encoding}" for encoding in encodings]
+    if manifest != None and manifest.is_fresh(path) and manifest.entries[path]["outputs"] == outputs:
+      continue
+    paths.append(path)
+
+  if jobs > 1 and len(paths) > 1:
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+      results = list(executor.map(compress_file, paths, [encodings] * len(paths)))
+  else:
+    results = [compress_file(path, encodings) for path in paths]
+
+  for path, outputs in zip(paths, results):
+    print(f"Compressed {path} to {', '.join(os.path.basename(output) for output in outputs)}")
+    if manifest != None:
+      manifest.record(path, outputs)
+
+  return paths
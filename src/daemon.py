@@ -0,0 +1,125 @@
+import contextlib
+import json
+import os
+import socket
+import socketserver
+import threading
+
+# Kept free of the build modules, so the client can import it without paying for them
+DAEMON_SOCKET_PATH = os.path.join(".cache", "daemon.sock")
+
+class DaemonUnavailable(Exception):
+  pass
+
+class SocketWriter():
+  # Forwards everything a handler prints to the client as it happens
+  def __init__(self, file) -> None:
+    self.file = file
+
+  def write(self, text):
+    if text:
+      send_message(self.file, {"stdout": text})
+    return len(text)
+
+  def flush(self):
+    self.file.flush()
+
+def send_message(file, message):
+  file.write(json.dumps(message).encode("utf-8") + b"\n")
+  file.flush()
+
+class BuildDaemon(socketserver.UnixStreamServer):
+  def __init__(self, socket_path: str, handlers: dict) -> None:
+    # Requests are served one at a time, builds share the manifest and caches
+    self.socket_path = socket_path
+    self.handlers = handlers
+    self.stopping = False
+    remove_stale_socket(socket_path)
+    dir_name = os.path.dirname(socket_path)
+    if dir_name and not os.path.exists(dir_name):
+      os.makedirs(dir_name)
+    super().__init__(socket_path, DaemonHandler)
+
+  def run(self):
+    print(f"Build daemon listening on {self.socket_path}")
+    try:
+      self.serve_forever()
+    finally:
+      self.server_close()
+      if os.path.exists(self.socket_path):
+        os.remove(self.socket_path)
+
+  def stop(self):
+    # serve_forever cannot be shut down from the thread running it
+    self.stopping = True
+    threading.Thread(target=self.shutdown, daemon=True).start()
+
+class DaemonHandler(socketserver.StreamRequestHandler):
+  def handle(self):
+    try:
+      request = json.loads(self.rfile.readline())
+    except ValueError as e:
+      send_message(self.wfile, {"done": True, "status": 2, "error": f"Invalid request: {e}"})
+      return
+
+    command = request.get("command")
+    if command == "ping":
+      send_message(self.wfile, {"done": True, "status": 0, "result": {"pid": os.getpid()}})
+      return
+    if command == "shutdown":
+      send_message(self.wfile, {"done": True, "status": 0})
+      self.server.stop()
+      return
+    handler = self.server.handlers.get(command)
+    if handler == None:
+      send_message(self.wfile, {"done": True, "status": 2, "error": f"Unknown command: {command}"})
+      return
+
+    response = {"done": True, "status": 0}
+    writer = SocketWriter(self.wfile)
+    try:
+      with contextlib.redirect_stdout(writer), contextlib.redirect_stderr(writer):
+        response["result"] = handler(request)
+    except SystemExit as e:
+      # argparse exits on --help and usage errors, which must not stop the daemon
+      response["status"] = e.code if isinstance(e.code, int) else (0 if e.code == None else 1)
+    except Exception as e:
+      response["status"] = 1
+      response["error"] = f"{type(e).__name__}: {e}"
+    send_message(self.wfile, response)
+
+def remove_stale_socket(socket_path):
+  if not os.path.exists(socket_path):
+    return
+  try:
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+      client.connect(socket_path)
+  except OSError:
+    os.remove(socket_path)
+    return
+  raise OSError(f"A build daemon is already listening on {socket_path}")
+
+def send_request(socket_path, request, on_output=None):
+  # Returns the final status and result, streaming printed output to on_output meanwhile
+  client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+  try:
+    try:
+      client.connect(socket_path)
+    except OSError as e:
+      raise DaemonUnavailable(f"No build daemon on {socket_path}: {e}")
+
+    with client.makefile("rwb") as file:
+      send_message(file, request)
+      for line in file:
+        message = json.loads(line)
+        if "stdout" in message:
+          if on_output != None:
+            on_output(message["stdout"])
+          continue
+        if message.get("error") != None and on_output != None:
+          on_output(message["error"] + "\n")
+        return message["status"], message.get("result")
+  finally:
+    client.close()
+
+  raise DaemonUnavailable(f"Build daemon on {socket_path} closed the connection")
@@ -0,0 +1,74 @@
+from collections import deque
+
+class DependencyGraph():
+  def __init__(self, edges: dict=None) -> None:
+    # Maps each node (a source, template or partial path) to the sorted paths it directly depends on
+    self.edges = edges if edges != None else {}
+
+  def set_deps(self, node, deps):
+    deps = sorted(set(deps))
+    if deps:
+      self.edges[node] = deps
+    else:
+      self.edges.pop(node, None)
+
+  def deps(self, node):
+    return self.edges.get(node, [])
+
+  def closure(self, node):
+    seen = set()
+    stack = list(self.deps(node))
+    while stack:
+      dep = stack.pop()
+      if dep in seen or dep == node:
+        continue
+      seen.add(dep)
+      stack.extend(self.deps(dep))
+    return sorted(seen)
+
+  def dependents(self):
+    reverse = {}
+    for node, deps in self.edges.items():
+      for dep in deps:
+        reverse.setdefault(dep, []).append(node)
+    return reverse
+
+  def invalidated(self, changed):
+    # Every node that reaches one of the changed nodes, the smallest set that has to be rebuilt
+    reverse = self.dependents()
+    affected = set()
+    queue = deque(changed)
+    while queue:
+      for node in reverse.get(queue.popleft(), []):
+        if node not in affected:
+          affected.add(node)
+          queue.append(node)
+    return affected
+
+  def path(self, node, target):
+    parents = {node: None}
+    queue = deque([node])
+    while queue:
+      current = queue.popleft()
+      if current == target:
+        path = []
+        while current != None:
+          path.append(current)
+          current = parents[current]
+        return path[::-1]
+      for dep in self.deps(current):
+        if dep not in parents:
+          parents[dep] = current
+          queue.append(dep)
+    return None
+
+  def prune(self, roots):
+    live = set(roots)
+    for root in roots:
+      live.update(self.closure(root))
+    for node in list(self.edges):
+      if node not in live:
+        del self.edges[node]
+
+  def __repr__(self) -> str:
+    return f"DependencyGraph({len(self.edges)} nodes)"
@@ -1,6 +1,165 @@
+import functools
+import re
+import sys
+import threading
+
+WHITESPACE_PATTERN = re.compile(r"\s+")
+MINIFY_TOKEN_PATTERN = re.compile(r"<!--.*?-->|</?[a-zA-Z][^>]*>|<![^>]*>|[^<]+|<", re.S)
+TAG_NAME_PATTERN = re.compile(r"</?([a-zA-Z][a-zA-Z0-9-]*)")
+
+# Whitespace inside these is content, everything else collapses to single spaces
+PRESERVE_WHITESPACE_TAGS = frozenset(["pre", "code", "textarea", "script", "style"])
+# Whitespace next to these is never rendered, so it is dropped instead of collapsed
+BLOCK_TAGS = frozenset([
+  "html", "head", "body", "title", "meta", "link", "base", "script", "style", "noscript",
+  "address", "article", "aside", "blockquote", "details", "dialog", "dd", "div", "dl", "dt",
+  "fieldset", "figcaption", "figure", "footer", "form", "h1", "h2", "h3", "h4", "h5", "h6",
+  "header", "hgroup", "hr", "li", "main", "menu", "nav", "ol", "p", "pre", "section",
+  "summary", "table", "tbody", "td", "tfoot", "th", "thead", "tr", "ul",
+])
+# A </p> may be left out when the next sibling is one of these, or when the parent ends
+# and is not one of P_END_REQUIRED_PARENTS
+P_CLOSING_TAGS = frozenset([
+  "address", "article", "aside", "blockquote", "details", "div", "dl", "fieldset", "figcaption",
+  "figure", "footer", "form", "h1", "h2", "h3", "h4", "h5", "h6", "header", "hgroup", "hr",
+  "main", "menu", "nav", "ol", "p", "pre", "section", "table", "ul",
+])
+P_END_REQUIRED_PARENTS = frozenset(["a", "audio", "del", "ins", "map", "noscript", "video"])
+
+# Quotes only need escaping inside attribute values, which are always double quoted
+TEXT_ESCAPES = str.maketrans({"&": "&amp;", "<": "&lt;", ">": "&gt;"})
+ATTRIBUTE_ESCAPES = str.maketrans({"&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;"})
+
+def escape_text(text):
+  # Almost all text has nothing to escape, and a few substring scans are much cheaper than translate
+  if "&" not in text and "<" not in text and ">" not in text:
+    return text
+  return text.translate(TEXT_ESCAPES)
+
+@functools.lru_cache(maxsize=4096)
+def attribute_to_html(name, value):
+  # Pages repeat the same links and image sources, so each attribute is escaped once
+  value = str(value)
+  if "&" in value or "<" in value or ">" in value or '"' in value:
+    value = value.translate(ATTRIBUTE_ESCAPES)
+  return f' {name}="{value}"'
+
+class MinifyStats():
+  # Pipeline stage threads serialize pages concurrently, += alone could lose their updates
+  __slots__ = ("bytes_saved", "lock")
+
+  def __init__(self) -> None:
+    self.bytes_saved = 0
+    self.lock = threading.Lock()
+
+  def add(self, count):
+    with self.lock:
+      self.bytes_saved += count
+
+  def take(self):
+    with self.lock:
+      count = self.bytes_saved
+      self.bytes_saved = 0
+    return count
+
+minify_stats = MinifyStats()
+
+def may_omit_end_tag(node, next_node, parent_tag):
+  tag = node.outer_tag()
+  if tag == "li":
+    return next_node == None or next_node.outer_tag() == "li"
+  if tag == "p":
+    if next_node == None:
+      return parent_tag not in P_END_REQUIRED_PARENTS
+    return next_node.outer_tag() in P_CLOSING_TAGS
+  return False
+
+def minify_token(text):
+  if text.startswith("<!--"):
+    return ("comment", text, None)
+  match = TAG_NAME_PATTERN.match(text)
+  if match != None and text.endswith(">"):
+    return ("close" if text[1] == "/" else "open", text, match.group(1).lower())
+  if text.startswith("<!"):
+    return ("open", text, "!doctype")
+  return ("text", text, None)
+
+def minify_html_fragments(fragments, block_edges=True):
+  # Minifies literal HTML that is split around unknown content, like the segments of a
+  # template around its slots. The preserved-whitespace state carries across the gaps,
+  # while text at a gap is only collapsed since its neighbour is not known yet.
+  preserve = 0
+  minified = []
+  last = len(fragments) - 1
+  for index, fragment in enumerate(fragments):
+    tokens = []
+    for match in MINIFY_TOKEN_PATTERN.finditer(fragment):
+      token = minify_token(match.group())
+      if token[0] == "comment" and not token[1].startswith("<!--["):
+        continue
+      if token[0] == "text" and tokens and tokens[-1][0] == "text":
+        tokens[-1] = ("text", tokens[-1][1] + token[1], None)
+        continue
+      tokens.append(token)
+
+    parts = []
+    for position, (kind, text, name) in enumerate(tokens):
+      if kind == "open" or kind == "comment":
+        parts.append(text)
+        if name in PRESERVE_WHITESPACE_TAGS and not text.endswith("/>"):
+          preserve += 1
+        continue
+
+      if kind == "close":
+        if name in PRESERVE_WHITESPACE_TAGS:
+          preserve = max(0, preserve - 1)
+        if name in ("li", "p") and preserve == 0 and end_tag_is_implied(name, tokens, position):
+          continue
+        parts.append(text)
+        continue
+
+      if preserve > 0:
+        parts.append(text)
+        continue
+
+      text = WHITESPACE_PATTERN.sub(" ", text)
+      if position > 0:
+        strip_left = tokens[position - 1][2] in BLOCK_TAGS or tokens[position - 1][2] == "!doctype"
+      else:
+        strip_left = block_edges and index == 0
+      if position < len(tokens) - 1:
+        strip_right = tokens[position + 1][2] in BLOCK_TAGS
+      else:
+        strip_right = block_edges and index == last
+      if strip_left:
+        text = text.lstrip(" ")
+      if strip_right:
+        text = text.rstrip(" ")
+      parts.append(text)
+
+    minified.append("".join(parts))
+
+  return minified
+
+def end_tag_is_implied(name, tokens, position):
+  # Looks past insignificant whitespace for the token that closes the element anyway,
+  # an end tag at the end of the fragment is kept since what follows is not known
+  for kind, text, next_name in tokens[position + 1:]:
+    if kind == "text" and text.isspace():
+      continue
+    if name == "li":
+      return (kind == "open" and next_name == "li") or (kind == "close" and next_name in ("ul", "ol", "menu"))
+    if kind == "open":
+      return next_name in P_CLOSING_TAGS
+    return kind == "close" and next_name not in P_END_REQUIRED_PARENTS
+  return False
+
 class HTMLNode():
+  # Pages create tens of thousands of nodes, slots keep each one free of a __dict__
+  __slots__ = ("tag", "value", "children", "props")
+
   def __init__(self, tag: str=None, value: str=None, children: object=None, props: dict=None) -> None:
-    self.tag = tag
+    self.tag = sys.intern(tag) if tag != None else None
     self.value = value
     self.children = children
     self.props = props
@@ -8,12 +167,27 @@ class HTMLNode():
   def to_html(self):
     raise NotImplementedError()
 
+  def iter_html(self):
+    yield self.to_html()
+
+  def iter_minified_html(self, omit_end=False, preserve=False):
+    yield self.to_html()
+
+  def to_minified_html(self):
+    return "".join(self.iter_minified_html())
+
+  def write_html(self, sink, minify=False):
+    for fragment in self.iter_minified_html() if minify else self.iter_html():
+      sink.write(fragment)
+
+  def outer_tag(self):
+    return self.tag
+
   def props_to_html(self):
     if self.props == None:
       return ""
 
-    mapped_items = map(lambda item: f' {item[0]}="{item[1]}"', self.props.items())
-    return "".join(mapped_items)
+    return "".join([attribute_to_html(name, value) for name, value in self.props.items()])
   
   def __repr__(self) -> str:
     return f"""HTMLNode
@@ -23,20 +197,73 @@ class HTMLNode():
     Props: {self.props_to_html()}
     """
 
+LEAVE_PRESERVE = object()
+
 class ParentNode(HTMLNode):
+  __slots__ = ()
+
   def __init__(self, tag: str, children: list, props: dict=None) -> None:
     super().__init__(tag, None, children, props)
 
   def to_html(self):
-    if self.tag == None:
-      raise ValueError("Tag is required for ParentNode")
+    return "".join(self.iter_html())
+
+  def iter_html(self):
+    # Walk the tree with an explicit stack of nodes and pending closing tags,
+    # so deep nesting neither recurses nor builds a string per subtree
+    stack = [self]
+    while stack:
+      item = stack.pop()
+      if isinstance(item, str):
+        yield item
+      elif isinstance(item, ParentNode):
+        if item.tag == None:
+          raise ValueError("Tag is required for ParentNode")
+
+        if item.children == None:
+          raise ValueError("Children is required for ParentNode")
+
+        yield f"<{item.tag}{item.props_to_html()}>"
+        stack.append(f"</{item.tag}>")
+        stack.extend(reversed(item.children))
+      else:
+        yield from item.iter_html()
+
+  def iter_minified_html(self, omit_end=False, preserve=False):
+    # Same walk as iter_html, but text outside pre/code has its whitespace collapsed and
+    # end tags the next sibling closes anyway are dropped
+    stack = [(self, omit_end)]
+    preserve_depth = 1 if preserve else 0
+    while stack:
+      item = stack.pop()
+      if isinstance(item, str):
+        yield item
+      elif item is LEAVE_PRESERVE:
+        preserve_depth -= 1
+      else:
+        node, omit = item
+        if not isinstance(node, ParentNode):
+          yield from node.iter_minified_html(omit, preserve_depth > 0)
+          continue
 
-    if self.children == None:
-      raise ValueError("Children is required for ParentNode")
+        if node.tag == None:
+          raise ValueError("Tag is required for ParentNode")
 
-    children_html = "".join(map(lambda child: child.to_html(), self.children))
+        if node.children == None:
+          raise ValueError("Children is required for ParentNode")
 
-    return f"<{self.tag}{self.props_to_html()}>{children_html}</{self.tag}>"
+        yield f"<{node.tag}{node.props_to_html()}>"
+        if node.tag in PRESERVE_WHITESPACE_TAGS:
+          preserve_depth += 1
+          stack.append(LEAVE_PRESERVE)
+        if omit:
+          minify_stats.add(len(node.tag) + 3)
+        else:
+          stack.append(f"</{node.tag}>")
+        children = node.children
+        for index in range(len(children) - 1, -1, -1):
+          next_child = children[index + 1] if index + 1 < len(children) else None
+          stack.append((children[index], may_omit_end_tag(children[index], next_child, node.tag)))
 
   def __repr__(self) -> str:
     return f"""ParentNode
@@ -45,7 +272,46 @@ class ParentNode(HTMLNode):
     Props: {self.props_to_html()}
     """
 
+class StreamingNode(HTMLNode):
+  # Like ParentNode, but children can be any iterable and are consumed once while serializing
+  __slots__ = ()
+
+  def __init__(self, tag: str, children: object, props: dict=None) -> None:
+    super().__init__(tag, None, children, props)
+
+  def to_html(self):
+    return "".join(self.iter_html())
+
+  def iter_html(self):
+    yield f"<{self.tag}{self.props_to_html()}>"
+    for child in self.children:
+      yield from child.iter_html()
+    yield f"</{self.tag}>"
+
+  def iter_minified_html(self, omit_end=False, preserve=False):
+    # Looks one child ahead to decide whether the current child needs its end tag
+    yield f"<{self.tag}{self.props_to_html()}>"
+    preserve = preserve or self.tag in PRESERVE_WHITESPACE_TAGS
+    children = iter(self.children)
+    child = next(children, None)
+    while child != None:
+      next_child = next(children, None)
+      yield from child.iter_minified_html(may_omit_end_tag(child, next_child, self.tag), preserve)
+      child = next_child
+    if omit_end:
+      minify_stats.add(len(self.tag) + 3)
+    else:
+      yield f"</{self.tag}>"
+
+  def __repr__(self) -> str:
+    return f"""StreamingNode
+    Tag: {self.tag}
+    Props: {self.props_to_html()}
+    """
+
 class LeafNode(HTMLNode):
+  __slots__ = ()
+
   def __init__(self, tag: str, value: str, props: dict=None) -> None:
     super().__init__(tag, value, None, props)
 
@@ -54,13 +320,100 @@ class LeafNode(HTMLNode):
       raise ValueError("Value is required for LeafNode")
 
     if self.tag == None:
-      return self.value
+      return escape_text(self.value)
+
+    return f"<{self.tag}{self.props_to_html()}>{escape_text(self.value)}</{self.tag}>"
+
+  def iter_html(self):
+    if self.value == None:
+      raise ValueError("Value is required for LeafNode")
+
+    if self.tag == None:
+      yield escape_text(self.value)
+      return
+
+    yield f"<{self.tag}{self.props_to_html()}>"
+    yield escape_text(self.value)
+    yield f"</{self.tag}>"
+
+  def iter_minified_html(self, omit_end=False, preserve=False):
+    if self.value == None:
+      raise ValueError("Value is required for LeafNode")
+
+    value = escape_text(self.value)
+    if not preserve and self.tag not in PRESERVE_WHITESPACE_TAGS:
+      collapsed = WHITESPACE_PATTERN.sub(" ", value)
+      minify_stats.add(len(value) - len(collapsed))
+      value = collapsed
+
+    if self.tag == None:
+      yield value
+      return
 
-    return f"<{self.tag}{self.props_to_html()}>{self.value}</{self.tag}>"
+    yield f"<{self.tag}{self.props_to_html()}>"
+    yield value
+    if omit_end:
+      minify_stats.add(len(self.tag) + 3)
+    else:
+      yield f"</{self.tag}>"
 
   def __repr__(self) -> str:
     return f"""LeafNode
     Tag: {self.tag}
     Value: {self.value}
     Props: {self.props_to_html()}
-    """
\ No newline at end of file
+    """
+
+class LeafSpanNode(LeafNode):
+  # A LeafNode whose value is the [start, end) range of a source string, sliced only when
+  # the node is serialized
+  __slots__ = ("source", "start", "end")
+
+  def __init__(self, tag: str, source: str, start: int, end: int, props: dict=None) -> None:
+    super().__init__(tag, None, props)
+    self.source = source
+    self.start = start
+    self.end = end
+
+  @property
+  def value(self):
+    return self.source[self.start:self.end] if self.source != None else None
+
+  @value.setter
+  def value(self, value):
+    self.source = value
+    self.start = 0
+    self.end = len(value) if value != None else 0
+
+class RawNode(HTMLNode):
+  # Holds HTML that is already serialized, so its value is never escaped
+  __slots__ = ()
+
+  def __init__(self, value: str) -> None:
+    super().__init__(None, value, None, None)
+
+  def to_html(self):
+    return self.value
+
+  def iter_html(self):
+    yield self.value
+
+  def iter_minified_html(self, omit_end=False, preserve=False):
+    # The fragment was rendered without minifying, so it goes through the same pass as template text
+    html = self.value if preserve else minify_html_fragments([self.value], block_edges=False)[0]
+    if omit_end:
+      html = html[:-len(self.outer_tag()) - 3]
+    minify_stats.add(len(self.value) - len(html))
+    yield html
+
+  def outer_tag(self):
+    # The tag of an element that spans the whole fragment, if there is one
+    match = TAG_NAME_PATTERN.match(self.value)
+    if match == None or self.value[1] == "/" or not self.value.endswith(f"</{match.group(1)}>"):
+      return None
+    return match.group(1)
+
+  def __repr__(self) -> str:
+    return f"""RawNode
+    Value: {self.value}
+    """
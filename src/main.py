@@ -1,29 +1,348 @@
+import argparse
+import cProfile
+import itertools
 import os
 import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
 
-from markdown import markdown_to_html_node
+from markdown import markdown_to_blocks, markdown_to_html_node, markdown_blocks_to_html_node, iter_markdown_blocks, block_to_html_node, render_block, get_block_cache, set_block_cache, get_text_spans, set_text_spans
+from assets import copy_file
+from cache import RENDER_VERSION, BlockCache
+from compress import compress_file, compress_outputs
+from daemon import DAEMON_SOCKET_PATH, BuildDaemon
+from htmlnode import HTMLNode, ParentNode, StreamingNode, escape_text, minify_stats
+from manifest import Manifest, hash_file
+from metadata import MetadataCache
+from pipeline import BackgroundWriter, Stage, format_stage_report, parse_stage_workers, prefetch, run_stages, write_file
+from server import ReloadServer
+from shard import MergeError, find_shard_manifests, in_shard, merge_shards, parse_shard, plan_merge, shard_manifest_path, shard_name, write_shard_manifest
+from siteindex import PageInfo, SiteIndex
+from stats import BuildStats
+from template import Template, load_template
+from textnode import text_to_textnodes
+from watch import watch
 
-def main():
-  is_public_exists = os.path.exists("public")
-  if is_public_exists:
-    shutil.rmtree("public")
+MANIFEST_PATH = os.path.join(".cache", "manifest.json")
+BLOCK_CACHE_PATH = os.path.join(".cache", "blocks.sqlite")
+SITE_INDEX_PATH = os.path.join(".cache", "site.sqlite")
+METADATA_CACHE_PATH = os.path.join(".cache", "metadata.json")
+SHARDS_PATH = "shards"
+MERGE_MANIFEST_PATH = os.path.join(".cache", "merge-manifest.json")
+MERGE_STATE_PATH = os.path.join(".cache", "merged-pages.json")
 
-  copy_files_from_folder_to_folder("static", "public")
-  generate_pages_recursive("content", "template.html", "public")
+WATCH_PATHS = ["content", "static", "template.html", "partials"]
+PAGE_STAGES = ["discover", "read", "parse", "render", "template", "write"]
 
-def copy_files_from_folder_to_folder(from_folder, to_folder):
-  print(f"Creating {to_folder}")
-  os.mkdir(to_folder)
+def main(argv=None):
+  parser = argparse.ArgumentParser(description="Build the static site into public/")
+  parser.add_argument("--incremental", action="store_true", help="only rebuild pages and assets whose inputs changed since the last build")
+  parser.add_argument("-j", "--jobs", type=int, default=None, help="render pages on N worker processes, 0 uses every CPU core (default 1, --compress uses every core)")
+  parser.add_argument("--link-static", action="store_true", help="hardlink static files into public/ instead of copying them")
+  parser.add_argument("--watch", action="store_true", help="keep running and rebuild whenever content/, static/ or template.html change")
+  parser.add_argument("--serve", action="store_true", help="serve public/ with live reload, implies --watch")
+  parser.add_argument("--port", type=int, default=8888, help="port for --serve (default 8888)")
+  parser.add_argument("--stats", action="store_true", help="print a per-stage and per-file timing table after the build")
+  parser.add_argument("--slowest", type=int, default=10, help="number of slowest files listed by --stats (default 10)")
+  parser.add_argument("--trace", metavar="PATH", help="write a Chrome trace-event JSON of the build stages")
+  parser.add_argument("--profile", metavar="PATH", help="run the build under cProfile and dump pstats to PATH")
+  parser.add_argument("--block-cache", action="store_true", help="reuse rendered blocks across pages and builds, kept in .cache/blocks.sqlite")
+  parser.add_argument("--block-cache-size", type=int, default=64, help="memory limit of the block cache in MB (default 64)")
+  parser.add_argument("--async-io", action="store_true", help="read sources ahead and write pages behind on background threads")
+  parser.add_argument("--io-depth", type=int, default=8, help="pages buffered on each side of --async-io and between --pipeline stages (default 8)")
+  parser.add_argument("--pipeline", action="store_true", help="build pages through separate read, parse, render, template and write stages and print their throughput")
+  parser.add_argument("--stage-workers", type=parse_stage_workers, default={}, metavar="STAGE=N,...", help="threads per --pipeline stage, e.g. read=2,write=4 (default 1 each)")
+  parser.add_argument("--explain", action="store_true", help="print why each page is rebuilt")
+  parser.add_argument("--compress", action="store_true", help="write .gz (and .br when brotli is installed) next to compressible outputs")
+  parser.add_argument("--compress-min-size", type=int, default=1024, help="smallest file in bytes that --compress compresses (default 1024)")
+  parser.add_argument("--text-spans", action="store_true", help="keep inline text as offsets into its block until it is written instead of copying substrings while parsing")
+  parser.add_argument("--minify", action="store_true", help="collapse whitespace and drop optional end tags while writing pages")
+  parser.add_argument("--shard", type=parse_shard, metavar="K/N", help="only render the pages of shard K out of N into shards/K-of-N/")
+  commands = parser.add_subparsers(dest="command")
+  commands.add_parser("merge", help="combine shards/*/ and static/ into public/, checking every page is built exactly once")
+  commands.add_parser("daemon", help="keep the build modules and caches warm and take builds from client.py")
+  list_parser = commands.add_parser("list", help="print the title and front matter of every page, reading only the head of each file")
+  list_parser.add_argument("path", nargs="?", default="content", help="directory to list (default content)")
+  args = parser.parse_args(argv)
+  if args.shard != None and (args.watch or args.serve or args.command != None):
+    parser.error("--shard cannot be combined with --watch, --serve or merge")
+  if args.shard != None and args.compress:
+    parser.error("--shard leaves compression to the merge, pass --compress to merge instead")
+  for name in args.stage_workers:
+    if name not in PAGE_STAGES[1:]:
+      parser.error(f"Unknown --stage-workers stage {name}, expected one of {', '.join(PAGE_STAGES[1:])}")
+
+  if args.command == "daemon":
+    serve_daemon()
+    return
+
+  if args.command == "list":
+    list_pages(args.path)
+    return
+  io_depth = args.io_depth if args.async_io else 0
+  set_text_spans(args.text_spans)
+  stage_workers = args.stage_workers if args.pipeline else None
+  compress_min_size = args.compress_min_size if args.compress else None
+  if args.jobs == None:
+    jobs = 1
+  else:
+    jobs = args.jobs if args.jobs > 0 else os.cpu_count() or 1
+  # Compression runs on every core unless -j says how many
+  compress_jobs = jobs if args.jobs != None else None
+
+  if args.command == "merge":
+    try:
+      merge(args.link_static, compress_jobs, compress_min_size)
+    except MergeError as e:
+      parser.exit(1, f"{e}\n")
+    return
+
+  stats = None
+  if args.stats or args.trace:
+    stats = BuildStats(trace=args.trace != None)
+    instrument_build(stats)
+    if jobs > 1:
+      print("Timing only covers this process, rendering pages serially")
+      jobs = 1
+    compress_jobs = 1
+  if stage_workers != None and jobs > 1:
+    parser.error("--pipeline runs its stages on threads and cannot be combined with -j")
+
+  options = build_options(args.minify)
+  if args.shard != None:
+    shard_dir_path = os.path.join(SHARDS_PATH, shard_name(args.shard))
+    manifest_path = os.path.join(".cache", f"manifest-{shard_name(args.shard)}.json")
+    if args.incremental:
+      manifest = Manifest.load(manifest_path, options)
+    else:
+      if os.path.exists(shard_dir_path):
+        shutil.rmtree(shard_dir_path)
+      manifest = Manifest(manifest_path, options=options)
+  elif args.incremental:
+    manifest = Manifest.load(MANIFEST_PATH, options)
+  else:
+    is_public_exists = os.path.exists("public")
+    if is_public_exists:
+      shutil.rmtree("public")
+    manifest = Manifest(MANIFEST_PATH, options=options)
+
+  if args.block_cache:
+    # The build daemon keeps its block cache, and the entries in it, from one build to the next
+    block_cache = get_block_cache()
+    if block_cache == None or block_cache.max_bytes != args.block_cache_size * 2**20:
+      set_block_cache(BlockCache(args.block_cache_size * 2**20, BLOCK_CACHE_PATH))
+  else:
+    set_block_cache(None)
+
+  if not args.watch and not args.serve:
+    profiler = cProfile.Profile() if args.profile else None
+    if profiler != None:
+      profiler.enable()
+    try:
+      if args.shard != None:
+        build_shard(manifest, args.shard, shard_dir_path, jobs, io_depth, args.explain, args.minify, stage_workers)
+      else:
+        build(manifest, jobs, args.link_static, io_depth, args.explain, compress_min_size, args.minify, stage_workers, compress_jobs)
+    finally:
+      if profiler != None:
+        profiler.disable()
+        profiler.dump_stats(args.profile)
+      if stats != None:
+        report_stats(stats, args)
+    return
+
+  try_build(manifest, jobs, args.link_static, io_depth, args.explain, compress_min_size, args.minify, stage_workers, compress_jobs)
+  server = None
+  if args.serve:
+    server = ReloadServer("public", args.port)
+    server.start()
+
+  def rebuild(changed):
+    print(f"Changed: {', '.join(changed)}")
+    if args.explain:
+      for from_path in manifest.invalidated(changed):
+        print(f"Invalidates {from_path}")
+    start = time.perf_counter()
+    if try_build(manifest, jobs, args.link_static, io_depth, args.explain, compress_min_size, args.minify, stage_workers, compress_jobs):
+      print(f"Rebuilt in {(time.perf_counter() - start) * 1000:.1f}ms")
+      if stats != None and args.stats:
+        count_minified_bytes(stats)
+        print(stats.report(args.slowest))
+        stats.reset()
+      if server != None:
+        server.notify_reload()
+
+  try:
+    watch(WATCH_PATHS, rebuild)
+  except KeyboardInterrupt:
+    if server != None:
+      server.stop()
+
+def build_options(minify=False):
+  # The render version is in here so a renderer whose output changed rebuilds every page,
+  # an incremental build would otherwise keep serving pages from the old one
+  return {"minify": minify, "render": RENDER_VERSION}
+
+def list_pages(dir_path_content):
+  metadata_cache = MetadataCache(METADATA_CACHE_PATH)
+  for meta in metadata_cache.scan(from_path for from_path, _ in iter_pages(dir_path_content, "")):
+    fields = "".join(f"\t{key}={value}" for key, value in sorted(meta.fields.items()))
+    print(f"{meta.source}\t{meta.title if meta.title != None else '-'}{fields}")
+  metadata_cache.prune()
+  metadata_cache.save()
+
+def serve_daemon():
+  daemon = BuildDaemon(DAEMON_SOCKET_PATH, {"build": daemon_build, "render": daemon_render})
+  try:
+    daemon.run()
+  except KeyboardInterrupt:
+    pass
+
+def daemon_build(request):
+  argv = request.get("argv", [])
+  for arg in argv:
+    if arg in ("--watch", "--serve", "daemon"):
+      raise ValueError(f"{arg} is not available through the build daemon")
+  main(argv)
+
+def daemon_render(request):
+  return {"html": render_file(request["path"], request.get("minify", False))}
+
+def render_file(from_path, minify=False):
+  # Renders one page to a string without writing it, for editors and previews
+  template = load_template(template_for(from_path, "content", "template.html"), minify)
+  with open(from_path, "r") as file:
+    markdown = file.read()
+  return render_page(markdown, template, PageInfo(from_path))
+
+def instrument_build(stats):
+  # Whole pages carry the per-file times, whatever is left of them after the nested
+  # stages below is directory setup and bookkeeping
+  stats.instrument(generate_page, "generate_page", 0)
+  stats.instrument(render_page, "generate_page", lambda args: args[2].source)
+  for function in [read_page_job, parse_page_job, render_page_job, template_page_job, write_page_job]:
+    stats.instrument(function, "pipeline", lambda args: args[0].page[0])
+  stats.instrument_file(open_source, "read")
+  stats.instrument(read_page, "read", lambda args: args[0][0])
+  stats.instrument(iter_markdown_blocks, "parse blocks")
+  stats.instrument(markdown_to_blocks, "parse blocks")
+  stats.instrument(block_to_html_node, "block_to_html_node")
+  stats.instrument(text_to_textnodes, "text_to_textnodes")
+  stats.instrument_method(ParentNode, "to_html", "to_html")
+  stats.instrument_method(StreamingNode, "to_html", "to_html")
+  stats.instrument_method(HTMLNode, "to_minified_html", "to_html")
+  stats.instrument_method(HTMLNode, "write_html", "to_html")
+  stats.instrument_method(Template, "render", "template")
+  stats.instrument_method(Template, "write", "template")
+  stats.instrument_file(open_output, "write")
+  stats.instrument(write_file, "write")
+  stats.instrument(copy_file, "static copy", 0)
+  stats.instrument(compress_file, "compress", 0)
+
+def count_minified_bytes(stats):
+  bytes_saved = minify_stats.take()
+  if bytes_saved > 0:
+    stats.count("minify bytes saved", bytes_saved)
+
+def report_stats(stats, args):
+  stats.uninstall()
+  count_minified_bytes(stats)
+  if args.stats:
+    print(stats.report(args.slowest))
+  if args.trace:
+    stats.write_trace(args.trace)
+    print(f"Wrote trace to {args.trace}")
+
+def build(manifest, jobs=1, link_static=False, io_depth=0, explain=False, compress_min_size=None, minify=False, stage_workers=None, compress_jobs=None):
+  manifest.reset()
+  copy_files_from_folder_to_folder("static", "public", manifest, link_static)
+  site_index = SiteIndex(SITE_INDEX_PATH)
+  try:
+    generate_pages_recursive("content", "template.html", "public", manifest, jobs, io_depth, site_index, explain, minify=minify, stage_workers=stage_workers)
+    if compress_min_size != None:
+      compress_outputs("public", manifest, compress_jobs, compress_min_size)
+  finally:
+    manifest.remove_stale()
+    manifest.save()
+    site_index.prune(from_path for from_path, _ in iter_pages("content", "public"))
+    site_index.close()
+    close_block_cache()
+
+def close_block_cache():
+  block_cache = get_block_cache()
+  if block_cache != None:
+    if block_cache.hits + block_cache.disk_hits + block_cache.misses > 0:
+      print(block_cache)
+    block_cache.close()
+
+def build_shard(manifest, shard, shard_dir_path, jobs=1, io_depth=0, explain=False, minify=False, stage_workers=None):
+  # A shard renders only its own pages and lists them in shard.json for the merge,
+  # static files are copied once by the merge instead of by every shard
+  manifest.reset()
+  output_dir = os.path.join(shard_dir_path, "public")
+  try:
+    built = generate_pages_recursive("content", "template.html", output_dir, manifest, jobs, io_depth, None, explain, minify=minify, shard=shard, stage_workers=stage_workers)
+  except BuildError:
+    # A failed shard must not leave a manifest the merge would accept
+    if os.path.exists(shard_manifest_path(shard_dir_path)):
+      os.remove(shard_manifest_path(shard_dir_path))
+    raise
+  finally:
+    manifest.remove_stale()
+    manifest.save()
+    close_block_cache()
+
+  pages = {from_path: dest_path for from_path, dest_path in iter_pages("content", output_dir) if in_shard(from_path, "content", shard)}
+  write_shard_manifest(shard_dir_path, shard, pages, set(from_path for from_path, _ in built))
+  print(f"Built shard {shard[0]}/{shard[1]}: {len(built)} of {len(pages)} page(s) rendered")
+
+def merge(link_static=False, compress_jobs=None, compress_min_size=None):
+  expected = set(os.path.relpath(dest_path, "public").replace(os.sep, "/") for _, dest_path in iter_pages("content", "public"))
+  plan = plan_merge(find_shard_manifests(SHARDS_PATH), expected, "static")
+
+  manifest = Manifest.load(MERGE_MANIFEST_PATH)
+  manifest.reset()
+  copy_files_from_folder_to_folder("static", "public", manifest, link_static)
+  copied = merge_shards(plan, "public", MERGE_STATE_PATH, link_static)
+  if compress_min_size != None:
+    compress_outputs("public", manifest, compress_jobs, compress_min_size)
+  manifest.remove_stale()
+  manifest.save()
+  print(f"Merged {len(plan)} page(s), {len(copied)} changed")
+
+def try_build(manifest, jobs=1, link_static=False, io_depth=0, explain=False, compress_min_size=None, minify=False, stage_workers=None, compress_jobs=None):
+  # Nothing a save can break, like a page, the template or a static file, should stop
+  # watch mode, report it and wait for the next save
+  try:
+    build(manifest, jobs, link_static, io_depth, explain, compress_min_size, minify, stage_workers, compress_jobs)
+  except BuildError as e:
+    print(e)
+    return False
+  except Exception as e:
+    print(f"Build failed: {type(e).__name__}: {e}")
+    return False
+  return True
+
+def copy_files_from_folder_to_folder(from_folder, to_folder, manifest=None, link=False):
+  if not os.path.exists(to_folder):
+    print(f"Creating {to_folder}")
+    os.makedirs(to_folder)
   list = os.listdir(from_folder)
   for item in list:
     is_file = os.path.isfile(os.path.join(from_folder, item))  
     if is_file:
+      from_path = os.path.join(from_folder, item)
+      dest_path = os.path.join(to_folder, item)
+      if manifest != None and manifest.is_fresh(from_path):
+        continue
       print(f"Copying {item} to {to_folder}")
-      shutil.copy(os.path.join(from_folder, item), to_folder)
+      copy_file(from_path, dest_path, link)
+      if manifest != None:
+        manifest.record(from_path, [dest_path])
     else:
       from_folder_path = os.path.join(from_folder, item)
       to_folder_path = os.path.join(to_folder, item)
-      copy_files_from_folder_to_folder(from_folder_path, to_folder_path)
+      copy_files_from_folder_to_folder(from_folder_path, to_folder_path, manifest, link)
 
 def extract_title(markdown):
   lines = markdown.split("\n")
@@ -34,45 +353,276 @@ def extract_title(markdown):
 
   raise Exception("Title not found")
 
-def generate_page(from_path, template_path, dest_path):
+def observe_until_title(info, blocks):
+  # The template needs the title before the content, so blocks are pulled through
+  # info.observe up to the title heading and held, the rest stay unread
+  blocks = info.observe(blocks)
+  head = []
+  for block in blocks:
+    head.append(block)
+    if info.title != None:
+      return itertools.chain(head, blocks)
+
+  raise Exception("Title not found")
+
+def generate_page(from_path, template_path, dest_path, minify=False):
   print(f"Generating page form {from_path} using {template_path} to {dest_path}")
 
   dir_name = os.path.dirname(dest_path)
   if not os.path.exists(dir_name):
     os.makedirs(dir_name)
 
-  with open(from_path, "r") as file:
-    markdown = file.read()
-  
-  with open(template_path, "r") as file:
-    template = file.read()
+  template = load_template(template_path, minify)
 
+  # The markdown is streamed block by block into a temporary file, so neither the source
+  # nor the page is ever held in memory whole and a failed render leaves no partial page
+  tmp_path = f"{dest_path}.tmp"
   try:
-    html_node = markdown_to_html_node(markdown)
+    with open_source(from_path) as file, open_output(tmp_path) as output:
+      info = PageInfo(from_path, dest_path)
+      html_node = markdown_blocks_to_html_node(observe_until_title(info, iter_markdown_blocks(file)))
+      values = {"Title": escape_text(info.title), "Content": html_node}
+      template.write(output, values)
   except Exception as e:
     print(f"Error: {e}")
-    raise 
+    if os.path.exists(tmp_path):
+      os.remove(tmp_path)
+    raise
 
-  title = extract_title(markdown) 
+  os.replace(tmp_path, dest_path)
+  return info
 
-  html = template.replace("{{ Title }}", title)
-  html = html.replace("{{ Content }}", html_node.to_html())
+def open_source(path):
+  return open(path, "r")
 
-  with open(dest_path, "w") as file:
-    file.write(html)
+def open_output(path):
+  return open(path, "w")
 
-def generate_pages_recursive(dir_path_content, template_path, dest_dir_path):
-  list = os.listdir(dir_path_content)
-  for item in list:
-    is_file = os.path.isfile(os.path.join(dir_path_content, item))  
-    if is_file:
+class PageError(Exception):
+  def __init__(self, from_path: str, error: Exception) -> None:
+    # Keep the constructor arguments in args so the error survives pickling from a worker
+    super().__init__(from_path, error)
+    self.from_path = from_path
+    self.error = error
+
+  def __str__(self) -> str:
+    return f"{self.from_path}: {type(self.error).__name__}: {self.error}"
+
+class BuildError(Exception):
+  def __init__(self, errors: list) -> None:
+    super().__init__(errors)
+    self.errors = errors
+
+  def __str__(self) -> str:
+    return f"{len(self.errors)} page(s) failed to build:\n" + "\n".join(map(str, self.errors))
+
+def find_pages(dir_path_content, dest_dir_path):
+  return list(iter_pages(dir_path_content, dest_dir_path))
+
+def iter_pages(dir_path_content, dest_dir_path):
+  for item in sorted(os.listdir(dir_path_content)):
+    from_path = os.path.join(dir_path_content, item)
+    if os.path.isfile(from_path):
       if item.endswith(".md"):
-        from_path = os.path.join(dir_path_content, item)
-        dest_path = os.path.join(dest_dir_path, item.replace(".md", ".html"))
-        generate_page(from_path, template_path, dest_path)
+        yield (from_path, os.path.join(dest_dir_path, item.replace(".md", ".html")))
     else:
-      from_folder_path = os.path.join(dir_path_content, item)
-      to_folder_path = os.path.join(dest_dir_path, item)
-      generate_pages_recursive(from_folder_path, template_path, to_folder_path)
+      yield from iter_pages(from_path, os.path.join(dest_dir_path, item))
+
+def template_for(from_path, dir_path_content, template_path):
+  # A template.html inside the content tree overrides the default for its directory and below
+  relative = os.path.relpath(os.path.dirname(from_path) or os.curdir, dir_path_content)
+  if relative == os.pardir or relative.startswith(os.pardir + os.sep):
+    return template_path
+  parts = [] if relative == os.curdir else relative.split(os.sep)
+  for depth in range(len(parts), -1, -1):
+    override = os.path.join(dir_path_content, *parts[:depth], "template.html")
+    if os.path.isfile(override):
+      return override
+  return template_path
+
+def page_assets(info, static_dir_path):
+  # Site-relative image references that resolve to a file in static/
+  assets = []
+  for url in info.images:
+    if url.startswith("/") and not url.startswith("//"):
+      path = os.path.join(static_dir_path, url.lstrip("/"))
+      if os.path.isfile(path):
+        assets.append(path)
+  return assets
+
+def iter_stale_pages(dir_path_content, template_path, dest_dir_path, manifest=None, site_index=None, explain=False, shard=None):
+  for from_path, dest_path in iter_pages(dir_path_content, dest_dir_path):
+    if not in_shard(from_path, dir_path_content, shard):
+      continue
+    page_template_path = template_for(from_path, dir_path_content, template_path)
+    reason = "full build"
+    if manifest != None:
+      reason = manifest.stale_reason(from_path, [page_template_path])
+    if reason == None and site_index != None and not site_index.contains(from_path):
+      reason = "missing from the site index"
+    if reason == None:
+      print(f"Skipping {from_path}, unchanged since last build")
+      continue
+    if explain:
+      print(f"Rebuilding {from_path}: {reason}")
+    yield (from_path, dest_path, page_template_path)
+
+def generate_pages_recursive(dir_path_content, template_path, dest_dir_path, manifest=None, jobs=1, io_depth=0, site_index=None, explain=False, static_dir_path="static", minify=False, shard=None, stage_workers=None):
+  pages = iter_stale_pages(dir_path_content, template_path, dest_dir_path, manifest, site_index, explain, shard)
+
+  if stage_workers != None:
+    results = generate_pages_staged(pages, stage_workers, io_depth or 8, minify)
+  elif io_depth > 0 and jobs <= 1:
+    # The walk feeds the prefetching reader directly
+    results = generate_pages_pipelined(pages, io_depth, minify)
+  else:
+    pages = list(pages)
+    if jobs > 1 and len(pages) > 1:
+      page_results = generate_pages_parallel(pages, jobs, minify)
+    else:
+      page_results = [try_generate_page(from_path, page_template_path, dest_path, minify) for from_path, dest_path, page_template_path in pages]
+    results = list(zip(pages, page_results))
+
+  errors = []
+  built = []
+  recorded_templates = set()
+  for (from_path, dest_path, page_template_path), result in results:
+    if isinstance(result, PageError):
+      errors.append(result)
+      continue
+    built.append((from_path, dest_path))
+    if manifest != None:
+      if page_template_path not in recorded_templates:
+        recorded_templates.add(page_template_path)
+        manifest.record_includes(load_template(page_template_path, minify).includes)
+      manifest.record(from_path, [dest_path], [page_template_path], page_assets(result, static_dir_path))
+    if site_index != None:
+      content_hash = manifest.hash(from_path) if manifest != None else hash_file(from_path)
+      site_index.update(result, content_hash)
+
+  if errors:
+    raise BuildError(errors)
+  return built
+
+def try_generate_page(from_path, template_path, dest_path, minify=False):
+  try:
+    return generate_page(from_path, template_path, dest_path, minify)
+  except Exception as e:
+    return PageError(from_path, e)
+
+def read_page(page):
+  with open(page[0], "r") as file:
+    return file.read()
+
+def render_page(markdown, template, info):
+  html_node = markdown_blocks_to_html_node(observe_until_title(info, markdown_to_blocks(markdown)))
+  return template.render({"Title": escape_text(info.title), "Content": html_node})
+
+def generate_pages_pipelined(pages, depth, minify=False):
+  # Sources are read ahead and finished pages written behind on background threads,
+  # with at most depth pages waiting on either side
+  writer = BackgroundWriter(depth)
+  results = []
+  for page, markdown, error in prefetch(pages, read_page, depth):
+    from_path, dest_path, template_path = page
+    info = PageInfo(from_path, dest_path)
+    if error == None:
+      print(f"Generating page form {from_path} using {template_path} to {dest_path}")
+      try:
+        writer.write(dest_path, render_page(markdown, load_template(template_path, minify), info), from_path)
+      except Exception as e:
+        print(f"Error: {e}")
+        error = e
+    results.append((page, PageError(from_path, error) if error != None else info))
+
+  write_errors = writer.close()
+  return [(page, PageError(page[0], write_errors[page[0]]) if page[0] in write_errors else result) for page, result in results]
+
+class PageJob():
+  # One page on its way through the stages, each stage fills in what the next one needs
+  # and drops what it consumed, so a page only ever holds one form of its content
+  def __init__(self, index: int, page: tuple, minify: bool=False) -> None:
+    self.index = index
+    self.page = page
+    self.minify = minify
+    self.info = PageInfo(page[0], page[1])
+    self.markdown = None
+    self.blocks = None
+    self.node = None
+    self.html = None
+
+def read_page_job(job):
+  job.markdown = read_page(job.page)
+  return job
+
+def parse_page_job(job):
+  job.blocks = list(observe_until_title(job.info, markdown_to_blocks(job.markdown)))
+  job.markdown = None
+  return job
+
+def render_page_job(job):
+  job.node = ParentNode("div", [render_block(block) for block in job.blocks])
+  job.blocks = None
+  return job
+
+def template_page_job(job):
+  template = load_template(job.page[2], job.minify)
+  job.html = template.render({"Title": escape_text(job.info.title), "Content": job.node})
+  job.node = None
+  return job
+
+def write_page_job(job):
+  write_file(job.page[1], job.html)
+  job.html = None
+  return job.info
+
+def announce_pages(pages):
+  # Logged as pages are discovered, stages with several workers would interleave the lines
+  for from_path, dest_path, template_path in pages:
+    print(f"Generating page form {from_path} using {template_path} to {dest_path}")
+    yield (from_path, dest_path, template_path)
+
+def generate_pages_staged(pages, stage_workers, depth, minify=False):
+  # discover -> read -> parse -> render -> template -> write, every stage on its own
+  # threads with at most depth pages queued in front of the next one
+  functions = [read_page_job, parse_page_job, render_page_job, template_page_job, write_page_job]
+  stages = [Stage(name, function, stage_workers.get(name, 1)) for name, function in zip(PAGE_STAGES[1:], functions)]
+  source = Stage(PAGE_STAGES[0])
+  jobs = (PageJob(index, page, minify) for index, page in enumerate(announce_pages(pages)))
+
+  results = []
+  for job, result, error in run_stages(jobs, stages, depth, source):
+    if error != None:
+      print(f"Error: {error}")
+      result = PageError(job.page[0], error)
+    results.append((job, result))
+
+  print(format_stage_report([source] + stages))
+  # Stages with several workers finish pages out of order, report them in walk order
+  results.sort(key=lambda result: result[0].index)
+  return [(job.page, result) for job, result in results]
+
+def init_worker(block_cache, text_spans):
+  set_block_cache(block_cache)
+  set_text_spans(text_spans)
+
+def generate_pages_parallel(pages, jobs, minify=False):
+  # Results are collected in walk order, so reporting does not depend on scheduling
+  block_cache = get_block_cache()
+  if block_cache != None:
+    # Never let forked workers inherit an open SQLite connection
+    block_cache.close()
+
+  with ProcessPoolExecutor(max_workers=jobs, initializer=init_worker, initargs=(block_cache, get_text_spans())) as executor:
+    futures = [executor.submit(try_generate_page, from_path, template_path, dest_path, minify) for from_path, dest_path, template_path in pages]
+    results = []
+    for (from_path, _, _), future in zip(pages, futures):
+      try:
+        results.append(future.result())
+      except Exception as e:
+        results.append(PageError(from_path, e))
+
+  return results
 
-main()
+if __name__ == "__main__":
+  main()
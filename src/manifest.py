@@ -0,0 +1,186 @@
+import hashlib
+import json
+import os
+
+from depgraph import DependencyGraph
+
+MANIFEST_VERSION = 3
+
+def hash_file(path):
+  digest = hashlib.sha256()
+  with open(path, "rb") as file:
+    for chunk in iter(lambda: file.read(65536), b""):
+      digest.update(chunk)
+  return digest.hexdigest()
+
+def file_stat(path):
+  stat = os.stat(path)
+  return [stat.st_size, stat.st_mtime_ns]
+
+def checksum_entries(entries):
+  payload = json.dumps(entries, sort_keys=True).encode("utf-8")
+  return hashlib.sha256(payload).hexdigest()
+
+class Manifest():
+  def __init__(self, path: str=None, entries: dict=None, graph: dict=None, options: dict=None) -> None:
+    self.path = path
+    self.entries = entries if entries != None else {}
+    self.graph = DependencyGraph(graph)
+    # Build options that change every output, like minification
+    self.options = options if options != None else {}
+    self.seen = set()
+    self.hashes = {}
+
+  @classmethod
+  def load(cls, path, options: dict=None):
+    options = options if options != None else {}
+    if not os.path.exists(path):
+      return cls(path, options=options)
+
+    try:
+      with open(path, "r") as file:
+        data = json.load(file)
+    except (OSError, ValueError) as e:
+      print(f"Manifest {path} is unreadable ({e}), doing a full rebuild")
+      return cls(path, options=options)
+
+    if not isinstance(data, dict) or data.get("version") != MANIFEST_VERSION:
+      print(f"Manifest {path} has an unsupported version, doing a full rebuild")
+      return cls(path, options=options)
+
+    entries = data.get("entries")
+    graph = data.get("graph")
+    if not isinstance(entries, dict) or not isinstance(graph, dict) or data.get("checksum") != checksum_entries([entries, graph, data.get("options")]):
+      print(f"Manifest {path} is corrupted, doing a full rebuild")
+      return cls(path, options=options)
+
+    if data.get("options") != options:
+      # Every page is rebuilt, but the entries stay so the outputs of sources deleted
+      # in the meantime are still removed as stale
+      print(f"Build options changed since the last build, doing a full rebuild")
+      for entry in entries.values():
+        entry["outdated"] = True
+
+    return cls(path, entries, graph, options)
+
+  def save(self):
+    dir_name = os.path.dirname(self.path)
+    if dir_name and not os.path.exists(dir_name):
+      os.makedirs(dir_name)
+
+    data = {
+      "version": MANIFEST_VERSION,
+      "checksum": checksum_entries([self.entries, self.graph.edges, self.options]),
+      "entries": self.entries,
+      "graph": self.graph.edges,
+      "options": self.options,
+    }
+    tmp_path = f"{self.path}.tmp"
+    with open(tmp_path, "w") as file:
+      json.dump(data, file, sort_keys=True, indent=2)
+    os.replace(tmp_path, self.path)
+
+  def reset(self):
+    # Forget per-build state so a long-running process can reuse the manifest
+    self.seen = set()
+    self.hashes = {}
+
+  def hash(self, path):
+    # Files like the template are shared by many pages, hash them once per build
+    if path not in self.hashes:
+      self.hashes[path] = hash_file(path)
+    return self.hashes[path]
+
+  def is_fresh(self, source, deps: list=None) -> bool:
+    return self.stale_reason(source, deps) == None
+
+  def stale_reason(self, source, deps: list=None):
+    # Returns why source has to be rebuilt, or None when its outputs are up to date
+    self.seen.add(source)
+    entry = self.entries.get(source)
+    if entry == None:
+      return "not built before"
+    if entry.get("outdated"):
+      return "build options changed"
+
+    # Same size and mtime means unchanged, only hash the content when they differ
+    stat = file_stat(source)
+    if entry.get("stat") != stat:
+      if entry["hash"] != self.hash(source):
+        return "source changed"
+      entry["stat"] = stat
+
+    # Assets found while rendering stay the same as long as the source does
+    expected = sorted(set(deps or []) | set(entry.get("assets", [])))
+    recorded = self.graph.deps(source)
+    for dep in expected:
+      if dep not in recorded:
+        return f"now depends on {dep}"
+    for dep in recorded:
+      if dep not in expected:
+        return f"no longer depends on {dep}"
+
+    for dep, digest in entry["deps"].items():
+      if not os.path.exists(dep):
+        return f"{self.explain_dep(source, dep)} was removed"
+      if self.hash(dep) != digest:
+        return f"{self.explain_dep(source, dep)} changed"
+
+    for output in entry["outputs"]:
+      if not os.path.exists(output):
+        return f"{output} is missing"
+
+    return None
+
+  def explain_dep(self, source, dep):
+    path = self.graph.path(source, dep)
+    return " -> ".join(path[1:]) if path != None else dep
+
+  def record(self, source, outputs: list, deps: list=None, assets: list=None):
+    self.seen.add(source)
+    self.graph.set_deps(source, (deps or []) + (assets or []))
+    entry = {
+      "hash": self.hash(source),
+      "stat": file_stat(source),
+      "deps": {dep: self.hash(dep) for dep in self.graph.closure(source)},
+      "outputs": list(outputs),
+    }
+    if assets:
+      entry["assets"] = sorted(set(assets))
+    self.entries[source] = entry
+
+  def record_includes(self, includes: dict):
+    for path, partials in includes.items():
+      self.graph.set_deps(path, partials)
+
+  def invalidated(self, changed):
+    return sorted(source for source in self.graph.invalidated(changed) if source in self.entries)
+
+  def remove_stale(self):
+    removed = []
+    stale = set(source for source in self.entries if source not in self.seen)
+    while stale:
+      live_outputs = set()
+      for source, entry in self.entries.items():
+        if source not in stale:
+          live_outputs.update(entry["outputs"])
+
+      removed_now = set()
+      for source in [source for source in self.entries if source in stale]:
+        for output in self.entries[source]["outputs"]:
+          if output not in live_outputs and os.path.exists(output):
+            if os.path.exists(source):
+              print(f"Removing {output}, it is no longer built from {source}")
+            else:
+              print(f"Removing {output}, {source} no longer exists")
+            os.remove(output)
+            removed.append(output)
+            removed_now.add(output)
+        del self.entries[source]
+
+      # A removed output can be the source of another entry, like a page whose compressed
+      # siblings were recorded before the page turned out to be stale
+      stale = set(source for source in self.entries if source in removed_now)
+
+    self.graph.prune(self.entries)
+    return removed
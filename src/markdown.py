@@ -1,11 +1,57 @@
+import itertools
 from enum import Enum
-from htmlnode import ParentNode
+from htmlnode import ParentNode, RawNode, StreamingNode
 from textnode import text_to_textnodes, text_node_to_html_node
 
+FRONT_MATTER_DELIMITER = "---"
+
+def is_front_matter_delimiter(line):
+  return line.strip() == FRONT_MATTER_DELIMITER
+
+def split_front_matter(lines):
+  # Returns the lines between a leading pair of --- lines and an iterator over the rest.
+  # Without a closing delimiter there is no front matter and every line is returned.
+  lines = iter(lines)
+  first = next(lines, None)
+  if first == None:
+    return [], lines
+  if not is_front_matter_delimiter(first):
+    return [], itertools.chain([first], lines)
+
+  front_matter = []
+  for line in lines:
+    if is_front_matter_delimiter(line):
+      return front_matter, lines
+    front_matter.append(line)
+  return [], itertools.chain([first], front_matter)
+
 def markdown_to_blocks(text):
+  end = text.find("\n")
+  if is_front_matter_delimiter(text if end == -1 else text[:end]):
+    _, lines = split_front_matter(text.split("\n"))
+    text = "\n".join(lines)
   blocks = text.split("\n\n")
   return list(filter(lambda x: x != "", map(lambda x: x.strip(), blocks)))
 
+def iter_markdown_blocks(lines):
+  # Yields the same blocks as markdown_to_blocks while holding only the current block,
+  # an empty line is exactly where split("\n\n") would cut
+  _, lines = split_front_matter(lines)
+  block = []
+  for line in lines:
+    line = line.rstrip("\n")
+    if line == "":
+      text = "\n".join(block).strip()
+      if text:
+        yield text
+      block = []
+    else:
+      block.append(line)
+
+  text = "\n".join(block).strip()
+  if text:
+    yield text
+
 def markdown_to_html_node(markdown):
   # Split the markdown into blocks
   blocks = markdown_to_blocks(markdown)
@@ -13,29 +59,72 @@ def markdown_to_html_node(markdown):
 
   for block in blocks:
     # determine the type of block
-    html_node = block_to_html_node(block)
+    html_node = render_block(block)
     children.append(html_node)
   return ParentNode("div", children, None)
 
+def markdown_lines_to_html_node(lines):
+  return markdown_blocks_to_html_node(iter_markdown_blocks(lines))
+
+def markdown_blocks_to_html_node(blocks):
+  # Blocks are parsed and rendered only while the returned node is being serialized
+  return StreamingNode("div", map(render_block, blocks))
+
+def block_title(block):
+  # A page's title is the first line of its first level one heading block
+  if not block.startswith("# "):
+    return None
+  return block[2:].split("\n", 1)[0].strip()
+
+def render_block(block):
+  if block_cache != None:
+    return cached_block_to_html_node(block)
+  return block_to_html_node(block)
+
+block_cache = None
+
+def set_block_cache(cache):
+  global block_cache
+  block_cache = cache
+
+def get_block_cache():
+  return block_cache
+
+text_spans = False
+
+def set_text_spans(enabled):
+  global text_spans
+  text_spans = enabled
+
+def get_text_spans():
+  return text_spans
+
+def cached_block_to_html_node(block):
+  html = block_cache.get(block)
+  if html == None:
+    html = block_to_html_node(block).to_html()
+    block_cache.put(block, html)
+  return RawNode(html)
+
 def block_to_html_node(block):
-  block_type = block_to_block_type(block)
+  block_type, lines, offsets = classify_block(block)
   if block_type == BlockType.PARAGRAPH:
-    return paragraph_to_html_node(block)
+    return paragraph_to_html_node(block, lines)
   if block_type == BlockType.HEADING:
     return heading_to_html_node(block)
   if block_type == BlockType.CODE:
     return code_to_html_node(block)
   if block_type == BlockType.QUOTE:
-    return quote_to_html_node(block)
+    return quote_to_html_node(block, lines)
   if block_type == BlockType.UNORDERED_LIST:
-    return unordered_list_to_html_node(block)
+    return unordered_list_to_html_node(block, lines, offsets)
   if block_type == BlockType.ORDERED_LIST:
-    return ordered_list_to_html_node(block)
+    return ordered_list_to_html_node(block, lines, offsets)
 
   raise ValueError(f"Unknown block type: {block_type}")
 
 def text_to_children(text):
-  text_nodes = text_to_textnodes(text)
+  text_nodes = text_to_textnodes(text, text_spans)
   children = []
 
   for text_node in text_nodes:
@@ -44,8 +133,9 @@ def text_to_children(text):
 
   return children
 
-def paragraph_to_html_node(block):
-  lines = block.split("\n")
+def paragraph_to_html_node(block, lines=None):
+  if lines == None:
+    lines = block.split("\n")
   paragraph = " ".join(lines)
   children = text_to_children(paragraph)
   return ParentNode("p", children) 
@@ -73,8 +163,9 @@ def code_to_html_node(block):
   code = ParentNode("code", children)
   return ParentNode("pre", [code])
 
-def quote_to_html_node(block):
-  lines = block.split("\n")
+def quote_to_html_node(block, lines=None):
+  if lines == None:
+    lines = block.split("\n")
   new_lines = []
   for line in lines:
     if not line.startswith(">"):
@@ -84,24 +175,26 @@ def quote_to_html_node(block):
   children = text_to_children(content)
   return ParentNode("blockquote", children)
 
-def unordered_list_to_html_node(block):
-  lines = block.split("\n")
-  items = []
-  for line in lines:
-    if not line.startswith("* ") and not line.startswith("- "):
+def unordered_list_to_html_node(block, lines=None, offsets=None):
+  if lines == None:
+    block_type, lines, offsets = classify_block(block)
+    if block_type != BlockType.UNORDERED_LIST:
       raise ValueError("Invalid unordered list block")
-    text = line[2:]
+  items = []
+  for line, offset in zip(lines, offsets):
+    text = line[offset:]
     children = text_to_children(text)
     items.append(ParentNode("li", children))
   return ParentNode("ul", items)
 
-def ordered_list_to_html_node(block):
-  lines = block.split("\n")
-  items = []
-  for i, line in enumerate(lines):
-    if not line.startswith(f"{i+1}. "):
+def ordered_list_to_html_node(block, lines=None, offsets=None):
+  if lines == None:
+    block_type, lines, offsets = classify_block(block)
+    if block_type != BlockType.ORDERED_LIST:
       raise ValueError("Invalid ordered list block")
-    text = line[3:]
+  items = []
+  for line, offset in zip(lines, offsets):
+    text = line[offset:]
     children = text_to_children(text)
     items.append(ParentNode("li", children))
   return ParentNode("ol", items)
@@ -115,25 +208,48 @@ class BlockType(Enum):
   ORDERED_LIST = "ordered_list"
 
 def block_to_block_type(block):
+  return classify_block(block)[0]
+
+# Built once and never changed, so render threads can share it
+ORDERED_PREFIXES = tuple(f"{i + 1}. " for i in range(100))
+
+def ordered_prefix(index):
+  if index < len(ORDERED_PREFIXES):
+    return ORDERED_PREFIXES[index]
+  return f"{index + 1}. "
+
+def classify_block(block):
+  # Returns the block type with the block's lines and, for lists, the length of each
+  # line's marker, so the renderers never have to split or re-check the block
   is_heading = block.startswith("#")
   if is_heading:
-    return BlockType.HEADING
+    return BlockType.HEADING, None, None
 
   is_code = block.startswith("```") and block.endswith("```")
   if is_code:
-    return BlockType.CODE
+    return BlockType.CODE, None, None
 
+  lines = block.split("\n")
   is_quote = block.startswith(">")
   if is_quote:
-    return BlockType.QUOTE
+    return BlockType.QUOTE, lines, None
 
-  is_unordered_list = all([line.startswith("* ") or line.startswith("- ") for line in block.split("\n")])
-  if is_unordered_list:
-    return BlockType.UNORDERED_LIST
-
-  is_ordered_list = all([line.startswith(f"{i+1}. ") for i, line in enumerate(block.split("\n"))])
-  if is_ordered_list:
-    return BlockType.ORDERED_LIST
+  is_unordered_list = True
+  is_ordered_list = True
+  offsets = []
+  for i, line in enumerate(lines):
+    if is_unordered_list and not (line.startswith("* ") or line.startswith("- ")):
+      is_unordered_list = False
+    if is_ordered_list:
+      prefix = ordered_prefix(i)
+      if line.startswith(prefix):
+        offsets.append(len(prefix))
+      else:
+        is_ordered_list = False
+    if not is_unordered_list and not is_ordered_list:
+      return BlockType.PARAGRAPH, lines, None
 
-  return BlockType.PARAGRAPH
+  if is_unordered_list:
+    return BlockType.UNORDERED_LIST, lines, [2] * len(lines)
 
+  return BlockType.ORDERED_LIST, lines, offsets
@@ -0,0 +1,111 @@
+import json
+import os
+
+from markdown import block_title, iter_markdown_blocks, split_front_matter
+
+METADATA_CACHE_VERSION = 1
+SCAN_BYTES = 4096
+
+class PageMeta():
+  def __init__(self, source: str, title: str=None, fields: dict=None) -> None:
+    self.source = source
+    self.title = title
+    self.fields = fields if fields != None else {}
+
+  def to_dict(self):
+    return {"title": self.title, "fields": self.fields}
+
+  def __eq__(self, other):
+    return isinstance(other, PageMeta) and (self.source, self.title, self.fields) == (other.source, other.title, other.fields)
+
+  def __repr__(self) -> str:
+    return f"PageMeta({self.source}, {self.title}, {self.fields})"
+
+def parse_front_matter(lines):
+  # Flat "key: value" pairs, enough for titles, dates and tags without a YAML dependency
+  fields = {}
+  for line in lines:
+    line = line.strip()
+    if not line or line.startswith("#") or ":" not in line:
+      continue
+    key, value = line.split(":", 1)
+    value = value.strip()
+    if len(value) >= 2 and value[0] == value[-1] and value[0] in "\"'":
+      value = value[1:-1]
+    fields[key.strip()] = value
+  return fields
+
+def scan_page(path, max_bytes=SCAN_BYTES):
+  # Reads at most max_bytes from the head of the file, a title past that is not found
+  with open(path, "rb") as file:
+    head = file.read(max_bytes)
+
+  lines = head.decode("utf-8", errors="ignore").split("\n")
+  if len(head) == max_bytes:
+    # The last line may have been cut off by the bound
+    lines = lines[:-1]
+
+  front_matter, _ = split_front_matter(lines)
+  title = None
+  for block in iter_markdown_blocks(lines):
+    title = block_title(block)
+    if title != None:
+      break
+
+  return PageMeta(path, title, parse_front_matter(front_matter))
+
+class MetadataCache():
+  def __init__(self, path: str=None, max_bytes: int=SCAN_BYTES) -> None:
+    self.path = path
+    self.max_bytes = max_bytes
+    self.entries = {}
+    self.changed = False
+    self.scans = 0
+    if path != None and os.path.exists(path):
+      self.load()
+
+  def load(self):
+    try:
+      with open(self.path, "r") as file:
+        data = json.load(file)
+    except (OSError, ValueError):
+      return
+    if isinstance(data, dict) and data.get("version") == METADATA_CACHE_VERSION and data.get("max_bytes") == self.max_bytes:
+      self.entries = data.get("entries", {})
+
+  def save(self):
+    if self.path == None or not self.changed:
+      return
+    dir_name = os.path.dirname(self.path)
+    if dir_name and not os.path.exists(dir_name):
+      os.makedirs(dir_name)
+    data = {"version": METADATA_CACHE_VERSION, "max_bytes": self.max_bytes, "entries": self.entries}
+    tmp_path = f"{self.path}.tmp"
+    with open(tmp_path, "w") as file:
+      json.dump(data, file, sort_keys=True)
+    os.replace(tmp_path, self.path)
+    self.changed = False
+
+  def get(self, source):
+    # Same size and mtime means the same head, so the file is not opened at all
+    stat = os.stat(source)
+    key = [stat.st_size, stat.st_mtime_ns]
+    entry = self.entries.get(source)
+    if entry != None and entry["key"] == key:
+      return PageMeta(source, entry["title"], entry["fields"])
+
+    meta = scan_page(source, self.max_bytes)
+    self.scans += 1
+    self.entries[source] = {"key": key, **meta.to_dict()}
+    self.changed = True
+    return meta
+
+  def scan(self, sources):
+    return [self.get(source) for source in sources]
+
+  def prune(self):
+    removed = [source for source in self.entries if not os.path.exists(source)]
+    for source in removed:
+      del self.entries[source]
+    self.changed = self.changed or bool(removed)
+    return removed
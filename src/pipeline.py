@@ -0,0 +1,227 @@
+import argparse
+import os
+import queue
+import threading
+import time
+
+DONE = object()
+
+class PrefetchError():
+  def __init__(self, error: Exception) -> None:
+    self.error = error
+
+def prefetch(items, load, depth=8):
+  # Runs load(item) on a background thread, at most depth items ahead of the consumer.
+  # Yields (item, result, error) in input order
+  results = queue.Queue(maxsize=depth)
+  stop = threading.Event()
+
+  def put(value):
+    while not stop.is_set():
+      try:
+        results.put(value, timeout=0.1)
+        return True
+      except queue.Full:
+        continue
+    return False
+
+  def produce():
+    try:
+      for item in items:
+        try:
+          value = (item, load(item), None)
+        except Exception as e:
+          value = (item, None, e)
+        if not put(value):
+          return
+    except Exception as e:
+      put(PrefetchError(e))
+    finally:
+      put(DONE)
+
+  thread = threading.Thread(target=produce, daemon=True)
+  thread.start()
+  try:
+    while True:
+      value = results.get()
+      if value is DONE:
+        return
+      if isinstance(value, PrefetchError):
+        raise value.error
+      yield value
+  finally:
+    stop.set()
+    thread.join()
+
+def write_file(path, text):
+  dir_name = os.path.dirname(path)
+  if dir_name and not os.path.exists(dir_name):
+    os.makedirs(dir_name, exist_ok=True)
+
+  tmp_path = f"{path}.tmp"
+  try:
+    with open(tmp_path, "w") as file:
+      file.write(text)
+  except Exception:
+    if os.path.exists(tmp_path):
+      os.remove(tmp_path)
+    raise
+  os.replace(tmp_path, path)
+
+class BackgroundWriter():
+  def __init__(self, depth: int=8) -> None:
+    self.queue = queue.Queue(maxsize=depth)
+    self.errors = {}
+    self.thread = threading.Thread(target=self.run, daemon=True)
+    self.thread.start()
+
+  def write(self, path, text, key=None):
+    # Blocks while depth writes are already pending, which bounds the memory held by pages
+    self.queue.put((path, text, key if key != None else path))
+
+  def run(self):
+    while True:
+      job = self.queue.get()
+      if job is DONE:
+        return
+      path, text, key = job
+      try:
+        write_file(path, text)
+      except Exception as e:
+        self.errors[key] = e
+
+  def close(self):
+    self.queue.put(DONE)
+    self.thread.join()
+    return self.errors
+
+class Stage():
+  def __init__(self, name: str, function=None, workers: int=1) -> None:
+    self.name = name
+    self.function = function
+    self.workers = workers
+    self.items = 0
+    self.errors = 0
+    self.busy = 0.0
+    self.lock = threading.Lock()
+
+  def record(self, elapsed, failed=False):
+    with self.lock:
+      self.items += 1
+      self.busy += elapsed
+      if failed:
+        self.errors += 1
+
+  def capacity(self):
+    # Items per second this stage could sustain with all of its workers busy
+    return self.items * self.workers / self.busy if self.busy > 0 else float("inf")
+
+  def __repr__(self) -> str:
+    return f"Stage({self.name}, {self.workers} worker(s), {self.items} items)"
+
+def run_stages(items, stages, depth=8, source=None):
+  # Every stage runs on its own worker threads and hands items to the next through a queue
+  # holding at most depth of them, so a slow stage stalls the ones before it instead of
+  # letting finished work pile up in memory. An item whose stage raised skips the rest.
+  # Yields (item, result, error) in completion order.
+  source = source if source != None else Stage("discover")
+  queues = [queue.Queue(maxsize=depth) for _ in range(len(stages) + 1)]
+  stop = threading.Event()
+
+  def put(target, value):
+    while not stop.is_set():
+      try:
+        target.put(value, timeout=0.1)
+        return True
+      except queue.Full:
+        continue
+    return False
+
+  def get(target):
+    while not stop.is_set():
+      try:
+        return target.get(timeout=0.1)
+      except queue.Empty:
+        continue
+    return DONE
+
+  def discover():
+    iterator = iter(items)
+    try:
+      while True:
+        start = time.perf_counter()
+        item = next(iterator, DONE)
+        if item is DONE:
+          return
+        source.record(time.perf_counter() - start)
+        if not put(queues[0], (item, item, None)):
+          return
+    except Exception as e:
+      put(queues[-1], PrefetchError(e))
+    finally:
+      put(queues[0], DONE)
+
+  def work(stage, inbox, outbox, remaining):
+    while True:
+      value = get(inbox)
+      if value is DONE:
+        # Pass the end on to sibling workers, the last one out tells the next stage
+        put(inbox, DONE)
+        with stage.lock:
+          remaining[0] -= 1
+          last = remaining[0] == 0
+        if last:
+          put(outbox, DONE)
+        return
+
+      item, payload, error = value
+      if error == None:
+        start = time.perf_counter()
+        try:
+          payload = stage.function(payload)
+        except Exception as e:
+          error = e
+        stage.record(time.perf_counter() - start, error != None)
+      if not put(outbox, (item, payload, error)):
+        return
+
+  threads = [threading.Thread(target=discover, daemon=True)]
+  for index, stage in enumerate(stages):
+    remaining = [stage.workers]
+    for _ in range(stage.workers):
+      threads.append(threading.Thread(target=work, args=(stage, queues[index], queues[index + 1], remaining), daemon=True))
+  for thread in threads:
+    thread.start()
+
+  try:
+    while True:
+      value = get(queues[-1])
+      if value is DONE:
+        return
+      if isinstance(value, PrefetchError):
+        raise value.error
+      yield value
+  finally:
+    stop.set()
+    for thread in threads:
+      thread.join()
+
+def format_stage_report(stages):
+  lines = [f"{'Stage':<12}{'Workers':>8}{'Items':>8}{'Busy ms':>12}{'Items/s':>12}"]
+  slowest = min(stages, key=lambda stage: stage.capacity()) if stages else None
+  for stage in stages:
+    capacity = stage.capacity()
+    rate = f"{capacity:>12.1f}" if capacity != float("inf") else f"{'-':>12}"
+    marker = "  <- bottleneck" if stage is slowest and stage.items > 0 else ""
+    lines.append(f"{stage.name:<12}{stage.workers:>8}{stage.items:>8}{stage.busy * 1000:>12.1f}{rate}{marker}")
+  return "\n".join(lines)
+
+def parse_stage_workers(text):
+  # "read=2,write=4" -> {"read": 2, "write": 4}
+  workers = {}
+  for part in filter(None, text.split(",")):
+    name, _, count = part.partition("=")
+    if not count.isdigit() or int(count) < 1:
+      raise argparse.ArgumentTypeError(f"Stage workers must look like name=N with N >= 1, got {part}")
+    workers[name.strip()] = int(count)
+  return workers
@@ -0,0 +1,87 @@
+import functools
+import os
+import threading
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+RELOAD_PATH = "/__reload"
+RELOAD_SCRIPT = b'<script>new EventSource("/__reload").onmessage = () => location.reload();</script>'
+
+class ReloadServer():
+  def __init__(self, directory: str, port: int) -> None:
+    self.version = 0
+    self.condition = threading.Condition()
+    handler = functools.partial(ReloadHandler, reloader=self, directory=directory)
+    self.httpd = ThreadingHTTPServer(("localhost", port), handler)
+
+  def start(self):
+    thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+    thread.start()
+    print(f"Serving on http://localhost:{self.httpd.server_address[1]}/")
+
+  def stop(self):
+    self.httpd.shutdown()
+    self.httpd.server_close()
+
+  def notify_reload(self):
+    with self.condition:
+      self.version += 1
+      self.condition.notify_all()
+
+  def wait_for_reload(self, version, timeout):
+    with self.condition:
+      self.condition.wait_for(lambda: self.version != version, timeout)
+      return self.version
+
+class ReloadHandler(SimpleHTTPRequestHandler):
+  def __init__(self, *args, reloader: ReloadServer=None, **kwargs) -> None:
+    self.reloader = reloader
+    super().__init__(*args, **kwargs)
+
+  def do_GET(self):
+    url_path = urlsplit(self.path).path
+    if url_path == RELOAD_PATH:
+      return self.send_reload_events()
+
+    path = self.translate_path(self.path)
+    if url_path.endswith("/") and os.path.isdir(path):
+      path = os.path.join(path, "index.html")
+    if path.endswith(".html") and os.path.isfile(path):
+      return self.send_html(path)
+
+    return super().do_GET()
+
+  def send_html(self, path):
+    with open(path, "rb") as file:
+      html = file.read()
+
+    # Only pages served by the dev server get the reload script, public/ stays untouched
+    index = html.rfind(b"</body>")
+    if index == -1:
+      index = len(html)
+    html = html[:index] + RELOAD_SCRIPT + html[index:]
+
+    self.send_response(200)
+    self.send_header("Content-Type", "text/html; charset=utf-8")
+    self.send_header("Content-Length", str(len(html)))
+    self.end_headers()
+    self.wfile.write(html)
+
+  def send_reload_events(self):
+    version = self.reloader.version
+    self.send_response(200)
+    self.send_header("Content-Type", "text/event-stream")
+    self.send_header("Cache-Control", "no-cache")
+    self.end_headers()
+
+    try:
+      while True:
+        new_version = self.reloader.wait_for_reload(version, 15)
+        if new_version == version:
+          self.wfile.write(b": keepalive\n\n")
+        else:
+          self.wfile.write(b"data: reload\n\n")
+          version = new_version
+        self.wfile.flush()
+    except (BrokenPipeError, ConnectionResetError):
+      pass
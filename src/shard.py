@@ -0,0 +1,160 @@
+import argparse
+import hashlib
+import json
+import os
+
+from assets import copy_file
+from manifest import hash_file
+
+SHARD_MANIFEST_VERSION = 1
+
+class MergeError(Exception):
+  def __init__(self, problems: list) -> None:
+    super().__init__(problems)
+    self.problems = problems
+
+  def __str__(self) -> str:
+    return f"Cannot merge shards, {len(self.problems)} problem(s):\n" + "\n".join(self.problems)
+
+def parse_shard(text):
+  try:
+    index, count = map(int, text.split("/"))
+  except ValueError:
+    raise argparse.ArgumentTypeError(f"Shard must look like K/N, got {text}")
+  if count < 1 or not 1 <= index <= count:
+    raise argparse.ArgumentTypeError(f"Shard {text} is out of range, K must be between 1 and N")
+  return (index, count)
+
+def shard_of(relative_path, count):
+  # Hashes the path relative to the content root, so every node agrees on the assignment
+  # no matter where the site is checked out or which OS path separator it uses
+  key = relative_path.replace(os.sep, "/").encode("utf-8")
+  return int.from_bytes(hashlib.sha256(key).digest()[:8], "big") % count + 1
+
+def in_shard(from_path, dir_path_content, shard):
+  return shard == None or shard_of(os.path.relpath(from_path, dir_path_content), shard[1]) == shard[0]
+
+def shard_name(shard):
+  return f"{shard[0]}-of-{shard[1]}"
+
+def shard_manifest_path(shard_dir_path):
+  return os.path.join(shard_dir_path, "shard.json")
+
+def load_shard_manifest(path):
+  with open(path, "r") as file:
+    data = json.load(file)
+  if not isinstance(data, dict) or data.get("version") != SHARD_MANIFEST_VERSION:
+    raise ValueError(f"Shard manifest {path} has an unsupported version")
+  return data
+
+def write_shard_manifest(shard_dir_path, shard, pages, built):
+  # pages maps every source in the shard to its output, built lists the sources rendered
+  # by this run. Outputs of the others are unchanged, so their hashes are reused.
+  path = shard_manifest_path(shard_dir_path)
+  previous = {}
+  if os.path.exists(path):
+    try:
+      previous = load_shard_manifest(path)["pages"]
+    except (OSError, ValueError, KeyError):
+      previous = {}
+
+  output_dir = os.path.join(shard_dir_path, "public")
+  entries = {}
+  for from_path, dest_path in sorted(pages.items()):
+    relative = os.path.relpath(dest_path, output_dir).replace(os.sep, "/")
+    entry = previous.get(relative)
+    if from_path in built or entry == None or entry.get("source") != from_path:
+      entry = {"source": from_path, "hash": hash_file(dest_path)}
+    entries[relative] = entry
+
+  data = {"version": SHARD_MANIFEST_VERSION, "shard": list(shard), "pages": entries}
+  tmp_path = f"{path}.tmp"
+  with open(tmp_path, "w") as file:
+    json.dump(data, file, sort_keys=True, indent=2)
+  os.replace(tmp_path, path)
+
+def find_shard_manifests(shards_path):
+  manifests = []
+  for name in sorted(os.listdir(shards_path)) if os.path.isdir(shards_path) else []:
+    path = shard_manifest_path(os.path.join(shards_path, name))
+    if os.path.isfile(path):
+      manifests.append((os.path.join(shards_path, name), load_shard_manifest(path)))
+  return manifests
+
+def plan_merge(manifests, expected_outputs=None, static_dir_path=None):
+  # Maps every output path to the shard that built it, after checking that the shards
+  # agree on N, none is missing and no output is claimed twice
+  problems = []
+  counts = sorted(set(data["shard"][1] for _, data in manifests))
+  if not manifests:
+    problems.append("No shard manifests found")
+  elif len(counts) > 1:
+    problems.append(f"Shards were built with different shard counts: {', '.join(map(str, counts))}")
+  else:
+    found = set(data["shard"][0] for _, data in manifests)
+    for index in range(1, counts[0] + 1):
+      if index not in found:
+        problems.append(f"Shard {index}/{counts[0]} is missing")
+
+  plan = {}
+  for shard_dir_path, data in manifests:
+    for relative, entry in data["pages"].items():
+      if relative in plan:
+        problems.append(f"{relative} is built by both {plan[relative][0]} and {shard_dir_path}")
+        continue
+      plan[relative] = (shard_dir_path, entry)
+
+  if expected_outputs != None:
+    for relative in sorted(expected_outputs - plan.keys()):
+      problems.append(f"{relative} is not built by any shard")
+    for relative in sorted(plan.keys() - expected_outputs):
+      problems.append(f"{relative} is built by {plan[relative][0]} but has no source")
+
+  if static_dir_path != None:
+    for relative in sorted(plan):
+      if os.path.exists(os.path.join(static_dir_path, relative)):
+        problems.append(f"{relative} is both a page and a static file")
+
+  if problems:
+    raise MergeError(problems)
+  return plan
+
+def merge_shards(plan, dest_dir_path, state_path, link=False):
+  # The state remembers the hash of every page merged last time, so only pages whose
+  # shard output changed are copied and pages that disappeared are removed
+  state = {}
+  if os.path.exists(state_path):
+    try:
+      with open(state_path, "r") as file:
+        state = json.load(file)
+    except (OSError, ValueError):
+      state = {}
+
+  copied = []
+  for relative, (shard_dir_path, entry) in sorted(plan.items()):
+    dest_path = os.path.join(dest_dir_path, relative)
+    if state.get(relative) == entry["hash"] and os.path.exists(dest_path):
+      continue
+    dir_name = os.path.dirname(dest_path)
+    if dir_name and not os.path.exists(dir_name):
+      os.makedirs(dir_name)
+    print(f"Merging {relative} from {shard_dir_path}")
+    copy_file(os.path.join(shard_dir_path, "public", relative), dest_path, link)
+    state[relative] = entry["hash"]
+    copied.append(relative)
+
+  for relative in sorted(state.keys() - plan.keys()):
+    dest_path = os.path.join(dest_dir_path, relative)
+    if os.path.exists(dest_path):
+      print(f"Removing {dest_path}, no shard builds it anymore")
+      os.remove(dest_path)
+    del state[relative]
+
+  dir_name = os.path.dirname(state_path)
+  if dir_name and not os.path.exists(dir_name):
+    os.makedirs(dir_name)
+  tmp_path = f"{state_path}.tmp"
+  with open(tmp_path, "w") as file:
+    json.dump(state, file, sort_keys=True, indent=2)
+  os.replace(tmp_path, state_path)
+  return copied
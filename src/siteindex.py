@@ -0,0 +1,111 @@
+import os
+import re
+import sqlite3
+import time
+
+from markdown import block_title
+
+OUTBOUND_LINK_PATTERN = re.compile(r"(?<!\!)\[(?:.*?)\]\((.*?)\)")
+IMAGE_REFERENCE_PATTERN = re.compile(r"!\[(?:.*?)\]\((.*?)\)")
+
+class PageInfo():
+  def __init__(self, source: str=None, output: str=None, title: str=None) -> None:
+    self.source = source
+    self.output = output
+    self.title = title
+    self.words = 0
+    self.links = []
+    self.images = []
+
+  def observe(self, blocks):
+    # Collects word counts, links and images from the blocks as they pass through to the renderer
+    for block in blocks:
+      if self.title == None:
+        self.title = block_title(block)
+      self.words += len(block.split())
+      if not block.startswith("```"):
+        self.links.extend(OUTBOUND_LINK_PATTERN.findall(block))
+        self.images.extend(IMAGE_REFERENCE_PATTERN.findall(block))
+      yield block
+
+  def __repr__(self) -> str:
+    return f"PageInfo({self.source}, {self.output}, {self.title}, {self.words} words, {len(self.links)} links)"
+
+class SiteIndex():
+  def __init__(self, path: str) -> None:
+    dir_name = os.path.dirname(path)
+    if dir_name and not os.path.exists(dir_name):
+      os.makedirs(dir_name)
+    self.path = path
+    # The page walk asks contains() from the reader thread of --async-io and --pipeline,
+    # it is never used by two threads at once
+    self.connection = sqlite3.connect(path, check_same_thread=False)
+    self.connection.executescript("""
+      CREATE TABLE IF NOT EXISTS pages (
+        source TEXT PRIMARY KEY,
+        output TEXT NOT NULL,
+        title TEXT NOT NULL,
+        hash TEXT NOT NULL,
+        words INTEGER NOT NULL,
+        built_at REAL NOT NULL
+      );
+      CREATE INDEX IF NOT EXISTS pages_output ON pages (output);
+      CREATE TABLE IF NOT EXISTS links (
+        source TEXT NOT NULL REFERENCES pages (source) ON DELETE CASCADE,
+        position INTEGER NOT NULL,
+        url TEXT NOT NULL,
+        PRIMARY KEY (source, position)
+      );
+      CREATE INDEX IF NOT EXISTS links_url ON links (url);
+    """)
+    self.connection.execute("PRAGMA foreign_keys = ON")
+
+  def update(self, info, content_hash, built_at=None):
+    with self.connection:
+      self.connection.execute(
+        "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?)",
+        (info.source, info.output, info.title, content_hash, info.words, built_at or time.time()),
+      )
+      self.connection.execute("DELETE FROM links WHERE source = ?", (info.source,))
+      self.connection.executemany("INSERT INTO links VALUES (?, ?, ?)", [(info.source, i, url) for i, url in enumerate(info.links)])
+
+  def contains(self, source):
+    return self.connection.execute("SELECT 1 FROM pages WHERE source = ?", (source,)).fetchone() != None
+
+  def get(self, source):
+    row = self.connection.execute("SELECT source, output, title, hash, words, built_at FROM pages WHERE source = ?", (source,)).fetchone()
+    if row == None:
+      return None
+    return self.page_from_row(row)
+
+  def find_by_output(self, output):
+    row = self.connection.execute("SELECT source, output, title, hash, words, built_at FROM pages WHERE output = ?", (output,)).fetchone()
+    if row == None:
+      return None
+    return self.page_from_row(row)
+
+  def pages(self, prefix=""):
+    rows = self.connection.execute(
+      "SELECT source, output, title, hash, words, built_at FROM pages WHERE source >= ? AND source < ? ORDER BY source",
+      (prefix, prefix + "￿"),
+    )
+    return [self.page_from_row(row) for row in rows]
+
+  def backlinks(self, url):
+    rows = self.connection.execute("SELECT DISTINCT source FROM links WHERE url = ? ORDER BY source", (url,))
+    return [row[0] for row in rows]
+
+  def page_from_row(self, row):
+    source, output, title, content_hash, words, built_at = row
+    links = [url for (url,) in self.connection.execute("SELECT url FROM links WHERE source = ? ORDER BY position", (source,))]
+    return {"source": source, "output": output, "title": title, "hash": content_hash, "words": words, "links": links, "built_at": built_at}
+
+  def prune(self, sources):
+    sources = set(sources)
+    stale = [source for (source,) in self.connection.execute("SELECT source FROM pages") if source not in sources]
+    with self.connection:
+      self.connection.executemany("DELETE FROM pages WHERE source = ?", [(source,) for source in stale])
+    return stale
+
+  def close(self):
+    self.connection.close()
@@ -0,0 +1,200 @@
+import inspect
+import json
+import sys
+import threading
+import time
+
+INSTRUMENTED_MODULES = ["__main__", "main", "markdown", "textnode", "htmlnode", "template", "assets", "compress", "pipeline"]
+
+class TimedFile():
+  # Times reads and writes on a file handed out by an instrumented opener
+  def __init__(self, file, stats, stage: str) -> None:
+    self.file = file
+    self.stats = stats
+    self.stage = stage
+    # The first read or write counts the file as a call, like the steps of a generator
+    self.calls = 1
+
+  def timed(self, function, *args):
+    frame = self.stats.enter()
+    start = time.perf_counter()
+    try:
+      return function(*args)
+    finally:
+      self.stats.leave(frame, self.stage, start, time.perf_counter(), calls=self.calls)
+      self.calls = 0
+
+  def __iter__(self):
+    return self
+
+  def __next__(self):
+    return self.timed(self.file.__next__)
+
+  def read(self, *args):
+    return self.timed(self.file.read, *args)
+
+  def readline(self, *args):
+    return self.timed(self.file.readline, *args)
+
+  def write(self, text):
+    return self.timed(self.file.write, text)
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, *exc_info):
+    self.file.close()
+
+  def __getattr__(self, name):
+    return getattr(self.file, name)
+
+class BuildStats():
+  def __init__(self, trace: bool=False) -> None:
+    self.stages = {}
+    self.files = {}
+    self.counters = {}
+    self.events = [] if trace else None
+    self.origin = time.perf_counter()
+    self.patches = []
+    # Each thread keeps the frames of the instrumented calls it is inside of, so a stage
+    # is charged only for the time not spent in the stages nested in it
+    self.local = threading.local()
+    self.lock = threading.Lock()
+
+  def reset(self):
+    self.stages = {}
+    self.files = {}
+    self.counters = {}
+    if self.events != None:
+      self.events = []
+
+  def add(self, stage, start, end, path=None, exclusive=None, calls=1):
+    elapsed = end - start
+    with self.lock:
+      count, total = self.stages.get(stage, (0, 0.0))
+      self.stages[stage] = (count + calls, total + (exclusive if exclusive != None else elapsed))
+      if path != None:
+        self.files[path] = self.files.get(path, 0.0) + elapsed
+      if self.events != None:
+        event = {"name": stage, "ph": "X", "ts": (start - self.origin) * 1e6, "dur": elapsed * 1e6, "pid": 0, "tid": threading.get_ident()}
+        if path != None:
+          event["args"] = {"path": path}
+        self.events.append(event)
+
+  def enter(self):
+    stack = getattr(self.local, "stack", None)
+    if stack == None:
+      stack = self.local.stack = []
+    # Time spent in nested instrumented calls
+    frame = [0.0]
+    stack.append(frame)
+    return frame
+
+  def leave(self, frame, stage, start, end, path=None, calls=1):
+    stack = self.local.stack
+    stack.pop()
+    if stack:
+      stack[-1][0] += end - start
+    self.add(stage, start, end, path, end - start - frame[0], calls)
+
+  def count(self, name, value):
+    with self.lock:
+      self.counters[name] = self.counters.get(name, 0) + value
+
+  def wrap(self, function, stage, path_arg=None):
+    # path_arg is the index of the argument naming the file, or a function of the arguments
+    if inspect.isgeneratorfunction(function):
+      return self.wrap_generator(function, stage)
+
+    def wrapper(*args, **kwargs):
+      path = None
+      if path_arg != None:
+        path = path_arg(args) if callable(path_arg) else args[path_arg]
+      frame = self.enter()
+      start = time.perf_counter()
+      try:
+        return function(*args, **kwargs)
+      finally:
+        self.leave(frame, stage, start, time.perf_counter(), path)
+
+    wrapper.__wrapped__ = function
+    return wrapper
+
+  def wrap_generator(self, function, stage):
+    # A generator runs a step at a time inside whoever consumes it, so every step is
+    # timed on its own and all steps of one call count as a single call
+    def wrapper(*args, **kwargs):
+      iterator = function(*args, **kwargs)
+      calls = 1
+      while True:
+        frame = self.enter()
+        start = time.perf_counter()
+        try:
+          item = next(iterator)
+        except StopIteration:
+          return
+        finally:
+          self.leave(frame, stage, start, time.perf_counter(), calls=calls)
+          calls = 0
+        yield item
+
+    wrapper.__wrapped__ = function
+    return wrapper
+
+  def instrument_file(self, opener, stage):
+    def wrapper(*args, **kwargs):
+      return TimedFile(opener(*args, **kwargs), self, stage)
+
+    wrapper.__wrapped__ = opener
+    self.replace(opener, wrapper)
+
+  def instrument(self, function, stage, path_arg=None):
+    # Hooks are swapped into the modules that reference the function instead of being
+    # checked on every call, so a build without --stats runs the original code untouched
+    self.replace(function, self.wrap(function, stage, path_arg))
+
+  def replace(self, function, wrapper):
+    for name in INSTRUMENTED_MODULES:
+      module = sys.modules.get(name)
+      if module == None:
+        continue
+      for attr, value in list(vars(module).items()):
+        if value is function:
+          setattr(module, attr, wrapper)
+          self.patches.append((module, attr, function))
+
+  def instrument_method(self, cls, name, stage):
+    function = cls.__dict__[name]
+    setattr(cls, name, self.wrap(function, stage))
+    self.patches.append((cls, name, function))
+
+  def uninstall(self):
+    for target, attr, original in reversed(self.patches):
+      setattr(target, attr, original)
+    self.patches = []
+
+  def report(self, slowest=10) -> str:
+    # Stage times are exclusive, time spent in a nested stage is only charged to that stage
+    lines = [f"{'Stage':<24}{'Calls':>8}{'Self ms':>12}{'Mean ms':>10}"]
+    for stage, (calls, total) in sorted(self.stages.items(), key=lambda item: -item[1][1]):
+      mean = f"{total * 1000 / calls:>10.3f}" if calls > 0 else f"{'-':>10}"
+      lines.append(f"{stage:<24}{calls:>8}{total * 1000:>12.1f}{mean}")
+    if self.stages:
+      lines.append(f"{'total':<24}{'':>8}{sum(total for _, total in self.stages.values()) * 1000:>12.1f}")
+
+    if self.files:
+      lines.append("")
+      lines.append(f"Slowest {min(slowest, len(self.files))} files:")
+      for path, total in sorted(self.files.items(), key=lambda item: -item[1])[:slowest]:
+        lines.append(f"{total * 1000:>10.1f}ms  {path}")
+
+    if self.counters:
+      lines.append("")
+      for name, value in sorted(self.counters.items()):
+        lines.append(f"{name:<24}{value:>8}")
+
+    return "\n".join(lines)
+
+  def write_trace(self, path):
+    with open(path, "w") as file:
+      json.dump({"traceEvents": self.events or [], "displayTimeUnit": "ms"}, file)
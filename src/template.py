@@ -0,0 +1,106 @@
+import os
+import re
+
+from htmlnode import minify_html_fragments, minify_stats
+
+PLACEHOLDER_PATTERN = re.compile(r"\{\{\s*(\w+)\s*\}\}")
+INCLUDE_PATTERN = re.compile(r"\{\{>\s*([^\s{}]+)\s*\}\}")
+
+class Template():
+  def __init__(self, segments: list, slots: list, includes: dict=None, minify: bool=False) -> None:
+    # Literal segments and placeholder slots alternate, starting and ending with a segment
+    if len(segments) != len(slots) + 1:
+      raise ValueError("Template needs exactly one more segment than slots")
+    self.segments = segments
+    self.slots = slots
+    # Maps the template and each partial it pulls in to the partials they include directly
+    self.includes = includes if includes != None else {}
+    # Minified templates also serialize node values minified
+    self.minify = minify
+    self.minify_saved = 0
+
+  def iter_parts(self, values: dict):
+    yield self.segments[0]
+    for slot, segment in zip(self.slots, self.segments[1:]):
+      if slot not in values:
+        raise ValueError(f"Missing value for template placeholder: {slot}")
+      yield values[slot]
+      yield segment
+
+  def render(self, values: dict) -> str:
+    if self.minify:
+      minify_stats.add(self.minify_saved)
+      return "".join(part if isinstance(part, str) else part.to_minified_html() for part in self.iter_parts(values))
+    return "".join(part if isinstance(part, str) else part.to_html() for part in self.iter_parts(values))
+
+  def write(self, file, values: dict):
+    # HTML node values are streamed into the file instead of being rendered to a string first
+    if self.minify:
+      minify_stats.add(self.minify_saved)
+    for part in self.iter_parts(values):
+      if isinstance(part, str):
+        file.write(part)
+      else:
+        part.write_html(file, self.minify)
+
+  def __repr__(self) -> str:
+    return f"Template({self.slots})"
+
+def compile_template(text, minify=False):
+  segments = []
+  slots = []
+  position = 0
+  for match in PLACEHOLDER_PATTERN.finditer(text):
+    segments.append(text[position:match.start()])
+    slots.append(match.group(1))
+    position = match.end()
+  segments.append(text[position:])
+
+  if not minify:
+    return Template(segments, slots)
+
+  # The literal markup is minified once here instead of on every page
+  minified = minify_html_fragments(segments)
+  template = Template(minified, slots, minify=True)
+  template.minify_saved = sum(map(len, segments)) - sum(map(len, minified))
+  return template
+
+def read_template_source(path, includes, stack=()):
+  # Partials are inlined before compiling, paths are relative to the file including them
+  if path in stack:
+    raise ValueError(f"Template include cycle: {' -> '.join(stack + (path,))}")
+  with open(path, "r") as file:
+    text = file.read()
+
+  partials = []
+  def expand(match):
+    partial = os.path.normpath(os.path.join(os.path.dirname(path), match.group(1)))
+    partials.append(partial)
+    return read_template_source(partial, includes, stack + (path,))
+
+  text = INCLUDE_PATTERN.sub(expand, text)
+  includes[path] = sorted(set(partials))
+  return text
+
+def template_files_key(paths):
+  return [(stat.st_mtime_ns, stat.st_size) for stat in map(os.stat, paths)]
+
+compiled_templates = {}
+
+def load_template(path, minify=False):
+  cached = compiled_templates.get((path, minify))
+  if cached != None:
+    paths, key, template = cached
+    try:
+      if template_files_key(paths) == key:
+        return template
+    except FileNotFoundError:
+      pass
+
+  includes = {}
+  template = compile_template(read_template_source(path, includes), minify)
+  template.includes = includes
+
+  paths = sorted(includes)
+  compiled_templates[(path, minify)] = (paths, template_files_key(paths), template)
+  return template
@@ -0,0 +1,46 @@
+import os
+import tempfile
+import unittest
+
+from assets import copy_file
+
+class TestCopyFile(unittest.TestCase):
+  def setUp(self):
+    self.tmp = tempfile.TemporaryDirectory()
+    self.source = os.path.join(self.tmp.name, "image.png")
+    self.dest = os.path.join(self.tmp.name, "copy.png")
+    with open(self.source, "wb") as file:
+      file.write(b"\x89PNG" + bytes(range(256)) * 100)
+
+  def tearDown(self):
+    self.tmp.cleanup()
+
+  def read(self, path):
+    with open(path, "rb") as file:
+      return file.read()
+
+  def test_copy(self):
+    method = copy_file(self.source, self.dest)
+
+    self.assertIn(method, ["copy_file_range", "copy"])
+    self.assertEqual(self.read(self.dest), self.read(self.source))
+    self.assertFalse(os.path.samefile(self.source, self.dest))
+
+  def test_link(self):
+    method = copy_file(self.source, self.dest, link=True)
+
+    self.assertEqual(method, "link")
+    self.assertTrue(os.path.samefile(self.source, self.dest))
+
+  def test_replacing_link_keeps_source(self):
+    copy_file(self.source, self.dest, link=True)
+    other = os.path.join(self.tmp.name, "other.png")
+    with open(other, "wb") as file:
+      file.write(b"other")
+    copy_file(other, self.dest)
+
+    self.assertEqual(self.read(self.dest), b"other")
+    self.assertNotEqual(self.read(self.source), b"other")
+
+if __name__ == "__main__":
+  unittest.main()
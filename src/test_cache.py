@@ -0,0 +1,78 @@
+import os
+import pickle
+import tempfile
+import unittest
+
+from cache import BlockCache
+from markdown import markdown_to_html_node, set_block_cache
+
+class TestBlockCache(unittest.TestCase):
+  def test_hit_and_miss(self):
+    cache = BlockCache()
+    self.assertIsNone(cache.get("# Title"))
+    cache.put("# Title", "<h1>Title</h1>")
+
+    self.assertEqual(cache.get("# Title"), "<h1>Title</h1>")
+    self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+  def test_evicts_least_recently_used(self):
+    cache = BlockCache(max_bytes=10)
+    cache.put("a", "aaaa")
+    cache.put("b", "bbbb")
+    cache.get("a")
+    cache.put("c", "cccc")
+
+    self.assertEqual(cache.get("a"), "aaaa")
+    self.assertIsNone(cache.get("b"))
+    self.assertEqual(cache.evictions, 1)
+    self.assertEqual(cache.size, 8)
+
+  def test_disk_tier(self):
+    with tempfile.TemporaryDirectory() as tmp:
+      path = os.path.join(tmp, "blocks.sqlite")
+      cache = BlockCache(path=path)
+      cache.put("# Title", "<h1>Title</h1>")
+      cache.close()
+
+      reopened = BlockCache(path=path)
+      self.assertEqual(reopened.get("# Title"), "<h1>Title</h1>")
+      self.assertEqual(reopened.disk_hits, 1)
+      reopened.close()
+
+  def test_prune_disk(self):
+    with tempfile.TemporaryDirectory() as tmp:
+      cache = BlockCache(path=os.path.join(tmp, "blocks.sqlite"), max_disk_bytes=10)
+      cache.put("a", "aaaa")
+      cache.put("b", "bbbb")
+      cache.put("c", "cccc")
+
+      self.assertEqual(cache.prune_disk(), 1)
+      cache.close()
+
+  def test_pickle_drops_entries(self):
+    with tempfile.TemporaryDirectory() as tmp:
+      path = os.path.join(tmp, "blocks.sqlite")
+      cache = BlockCache(max_bytes=100, path=path)
+      cache.put("a", "aaaa")
+      copy = pickle.loads(pickle.dumps(cache))
+      cache.close()
+
+      self.assertEqual((copy.max_bytes, copy.path), (100, path))
+      self.assertEqual(len(copy.entries), 0)
+
+class TestCachedMarkdownToHtmlNode(unittest.TestCase):
+  def tearDown(self):
+    set_block_cache(None)
+
+  def test_same_html(self):
+    md = "# Title\n\nSome **bold** text\n\n* one\n* two\n\nSome **bold** text"
+    expected = markdown_to_html_node(md).to_html()
+    cache = BlockCache()
+    set_block_cache(cache)
+
+    self.assertEqual(markdown_to_html_node(md).to_html(), expected)
+    self.assertEqual(markdown_to_html_node(md).to_html(), expected)
+    self.assertEqual((cache.hits, cache.misses), (5, 3))
+
+if __name__ == "__main__":
+  unittest.main()
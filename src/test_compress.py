@@ -0,0 +1,105 @@
+import contextlib
+import gzip
+import io
+import os
+import tempfile
+import unittest
+
+from compress import brotli, compress_file, compress_outputs
+from manifest import Manifest
+
+class TestCompress(unittest.TestCase):
+  def setUp(self):
+    self.tmp = tempfile.TemporaryDirectory()
+    self.dir = os.path.join(self.tmp.name, "public")
+    self.page = self.write("blog/index.html", "<p>" + "compressible text " * 200 + "</p>")
+    self.css = self.write("index.css", "body { color: red; }\n" * 100)
+    self.small = self.write("contact/index.html", "<p>hi</p>")
+    self.image = self.write("images/logo.png", "png" * 1000)
+
+  def tearDown(self):
+    self.tmp.cleanup()
+
+  def write(self, name, content):
+    path = os.path.join(self.dir, name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as file:
+      file.write(content)
+    return path
+
+  def test_gzip_round_trip_is_deterministic(self):
+    self.assertEqual(compress_file(self.page, ["gz"]), [f"{self.page}.gz"])
+    with open(f"{self.page}.gz", "rb") as file:
+      first = file.read()
+    compress_file(self.page, ["gz"])
+    with open(f"{self.page}.gz", "rb") as file:
+      second = file.read()
+    with open(self.page, "rb") as file:
+      self.assertEqual(gzip.decompress(first), file.read())
+
+    self.assertEqual(first, second)
+
+  @unittest.skipIf(brotli == None, "brotli is not installed")
+  def test_brotli(self):
+    compress_file(self.page, ["br"])
+    with open(f"{self.page}.br", "rb") as file, open(self.page, "rb") as original:
+      self.assertEqual(brotli.decompress(file.read()), original.read())
+
+  def test_skips_small_and_incompressible_files(self):
+    compressed = compress_outputs(self.dir, min_size=1024, encodings=["gz"])
+
+    self.assertEqual(compressed, [self.css, self.page])
+    self.assertFalse(os.path.exists(f"{self.small}.gz"))
+    self.assertFalse(os.path.exists(f"{self.image}.gz"))
+
+  def test_unchanged_files_are_not_recompressed(self):
+    manifest = Manifest(os.path.join(self.tmp.name, "manifest.json"))
+    compress_outputs(self.dir, manifest, encodings=["gz"])
+    manifest.reset()
+    self.write("index.css", "body { color: blue; }\n" * 100)
+
+    self.assertEqual(compress_outputs(self.dir, manifest, encodings=["gz"]), [self.css])
+    with gzip.open(f"{self.css}.gz", "rt") as file:
+      self.assertTrue(file.read().startswith("body { color: blue; }"))
+
+  def test_deleted_page_drops_compressed_siblings(self):
+    # Same order as a build: pages are recorded, outputs compressed, then stale outputs removed
+    source = os.path.join(self.tmp.name, "blog.md")
+    with open(source, "w") as file:
+      file.write("# Blog")
+    manifest = Manifest(os.path.join(self.tmp.name, "manifest.json"))
+    manifest.record(source, [self.page])
+    compress_outputs(self.dir, manifest, encodings=["gz"])
+    manifest.remove_stale()
+
+    os.remove(source)
+    manifest.reset()
+    compress_outputs(self.dir, manifest, encodings=["gz"])
+    manifest.remove_stale()
+
+    self.assertFalse(os.path.exists(self.page))
+    self.assertFalse(os.path.exists(f"{self.page}.gz"))
+    self.assertTrue(os.path.exists(f"{self.css}.gz"))
+    self.assertNotIn(self.page, manifest.entries)
+
+  def test_parallel_matches_serial(self):
+    compress_outputs(self.dir, jobs=1, encodings=["gz"])
+    with open(f"{self.page}.gz", "rb") as file:
+      serial = file.read()
+    for jobs in [2, None]:
+      os.remove(f"{self.page}.gz")
+      compress_outputs(self.dir, jobs=jobs, encodings=["gz"])
+      with open(f"{self.page}.gz", "rb") as file:
+        self.assertEqual(file.read(), serial)
+
+  @unittest.skipIf(brotli != None, "brotli is installed")
+  def test_missing_brotli_is_reported(self):
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+      compress_outputs(self.dir, jobs=1)
+
+    self.assertIn("Warning: brotli is not installed", output.getvalue())
+    self.assertTrue(os.path.exists(f"{self.page}.gz"))
+
+if __name__ == "__main__":
+  unittest.main()
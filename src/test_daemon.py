@@ -0,0 +1,64 @@
+import os
+import tempfile
+import threading
+import unittest
+
+from daemon import BuildDaemon, DaemonUnavailable, send_request
+
+class TestBuildDaemon(unittest.TestCase):
+  def setUp(self):
+    self.tmp = tempfile.TemporaryDirectory()
+    self.socket_path = os.path.join(self.tmp.name, "daemon.sock")
+    self.calls = []
+    self.daemon = BuildDaemon(self.socket_path, {"build": self.build, "fail": self.fail_request})
+    self.thread = threading.Thread(target=self.daemon.run, daemon=True)
+    self.thread.start()
+
+  def tearDown(self):
+    if self.thread.is_alive():
+      send_request(self.socket_path, {"command": "shutdown"})
+      self.thread.join(5)
+    self.tmp.cleanup()
+
+  def build(self, request):
+    self.calls.append(request["argv"])
+    print("Generating page")
+    return {"pages": len(self.calls)}
+
+  def fail_request(self, request):
+    print("Starting")
+    raise ValueError("broken page")
+
+  def test_streams_output_and_result(self):
+    output = []
+    status, result = send_request(self.socket_path, {"command": "build", "argv": ["--incremental"]}, output.append)
+    self.assertEqual((status, result), (0, {"pages": 1}))
+    self.assertEqual("".join(output), "Generating page\n")
+
+    send_request(self.socket_path, {"command": "build", "argv": []})
+    self.assertEqual(self.calls, [["--incremental"], []])
+
+  def test_errors_do_not_stop_the_daemon(self):
+    output = []
+    status, _ = send_request(self.socket_path, {"command": "fail"}, output.append)
+    self.assertEqual(status, 1)
+    self.assertEqual(output, ["Starting", "\n", "ValueError: broken page\n"])
+
+    status, _ = send_request(self.socket_path, {"command": "missing"})
+    self.assertEqual(status, 2)
+    self.assertEqual(send_request(self.socket_path, {"command": "ping"})[0], 0)
+
+  def test_shutdown_removes_socket(self):
+    send_request(self.socket_path, {"command": "shutdown"})
+    self.thread.join(5)
+
+    self.assertFalse(os.path.exists(self.socket_path))
+    with self.assertRaises(DaemonUnavailable):
+      send_request(self.socket_path, {"command": "ping"})
+
+  def test_second_daemon_is_refused(self):
+    with self.assertRaises(OSError):
+      BuildDaemon(self.socket_path, {})
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,36 @@
+import unittest
+
+from depgraph import DependencyGraph
+
+class TestDependencyGraph(unittest.TestCase):
+  def setUp(self):
+    self.graph = DependencyGraph()
+    self.graph.set_deps("a.md", ["template.html", "static/a.png"])
+    self.graph.set_deps("b.md", ["blog/template.html"])
+    self.graph.set_deps("template.html", ["partials/nav.html"])
+    self.graph.set_deps("blog/template.html", ["partials/nav.html", "partials/post.html"])
+
+  def test_closure_is_transitive(self):
+    self.assertEqual(self.graph.closure("a.md"), ["partials/nav.html", "static/a.png", "template.html"])
+
+  def test_invalidated_is_minimal(self):
+    self.assertEqual(self.graph.invalidated(["partials/post.html"]), {"blog/template.html", "b.md"})
+    self.assertEqual(self.graph.invalidated(["partials/nav.html"]), {"template.html", "blog/template.html", "a.md", "b.md"})
+    self.assertEqual(self.graph.invalidated(["static/a.png"]), {"a.md"})
+    self.assertEqual(self.graph.invalidated(["unrelated.css"]), set())
+
+  def test_path_explains_dependency(self):
+    self.assertEqual(self.graph.path("b.md", "partials/post.html"), ["b.md", "blog/template.html", "partials/post.html"])
+    self.assertEqual(self.graph.path("a.md", "partials/post.html"), None)
+
+  def test_cycles_terminate(self):
+    self.graph.set_deps("partials/nav.html", ["template.html"])
+    self.assertEqual(self.graph.closure("template.html"), ["partials/nav.html"])
+    self.assertIn("a.md", self.graph.invalidated(["partials/nav.html"]))
+
+  def test_prune_keeps_reachable_nodes(self):
+    self.graph.prune(["b.md"])
+    self.assertEqual(sorted(self.graph.edges), ["b.md", "blog/template.html"])
+
+if __name__ == "__main__":
+  unittest.main()
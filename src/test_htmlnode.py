@@ -1,6 +1,8 @@
+import io
+import sys
 import unittest
 
-from htmlnode import HTMLNode, LeafNode, ParentNode
+from htmlnode import HTMLNode, LeafNode, LeafSpanNode, ParentNode, RawNode, StreamingNode, escape_text, minify_html_fragments, minify_stats
 
 class TestHTMLNode(unittest.TestCase):
   def test_correct_prop_values(self):
@@ -30,6 +32,15 @@ class TestHTMLNode(unittest.TestCase):
     node = HTMLNode(tag, value, children, props)
     self.assertEqual(node.props_to_html(), "")
 
+  def test_no_instance_dict(self):
+    for node in [HTMLNode("div"), ParentNode("div", []), LeafNode(None, "text")]:
+      self.assertFalse(hasattr(node, "__dict__"))
+
+  def test_tag_is_interned(self):
+    level = 2
+    node = LeafNode(f"h{level}", "Heading")
+    self.assertIs(node.tag, "h2")
+
   def test_repr(self):
     tag = "div"
     value = "This is a div"
@@ -138,6 +149,100 @@ class TestParentNode(unittest.TestCase):
     expected_html2 = '<div><p><section><p><b>Bold text</b>Normal text</p></section>Normal text<i>italic text</i>Normal text</p><p><b>Bold text</b>Normal text<i>italic text</i>Normal text</p></div>'
     self.assertEqual(node2.to_html(), expected_html2)
 
+  def test_write_html(self):
+    leaf1 = LeafNode("b", "Bold text")
+    leaf2 = LeafNode(None, "Normal text")
+    node = ParentNode("div", [ParentNode("p", [leaf1, leaf2])], {"class": "post"})
+    sink = io.StringIO()
+    node.write_html(sink)
+
+    self.assertEqual(sink.getvalue(), '<div class="post"><p><b>Bold text</b>Normal text</p></div>')
+    self.assertEqual("".join(node.iter_html()), node.to_html())
+
+  def test_to_html_deep_tree(self):
+    depth = sys.getrecursionlimit() * 2
+    node = LeafNode(None, "deep")
+    for _ in range(depth):
+      node = ParentNode("span", [node])
+
+    self.assertEqual(node.to_html(), "<span>" * depth + "deep" + "</span>" * depth)
+
+class TestMinify(unittest.TestCase):
+  def test_collapses_text_whitespace(self):
+    node = ParentNode("div", [ParentNode("blockquote", [LeafNode(None, "spread   over\n  lines "), LeafNode("b", "bold")])])
+    self.assertEqual(node.to_minified_html(), "<div><blockquote>spread over lines <b>bold</b></blockquote></div>")
+
+  def test_preserves_pre_and_code(self):
+    code = ParentNode("pre", [ParentNode("code", [LeafNode(None, "def f():\n    return  1\n")])])
+    inline = ParentNode("blockquote", [LeafNode("code", "a  b"), LeafNode(None, "  c")])
+    node = ParentNode("div", [code, inline])
+
+    self.assertEqual(node.to_minified_html(), "<div><pre><code>def f():\n    return  1\n</code></pre><blockquote><code>a  b</code> c</blockquote></div>")
+
+  def test_drops_implied_end_tags(self):
+    items = ParentNode("ul", [ParentNode("li", [LeafNode(None, "one")]), ParentNode("li", [LeafNode(None, "two")])])
+    node = ParentNode("div", [ParentNode("p", [LeafNode(None, "a")]), items, ParentNode("p", [LeafNode(None, "b")])])
+
+    self.assertEqual(node.to_minified_html(), "<div><p>a<ul><li>one<li>two</ul><p>b</div>")
+
+  def test_keeps_end_tags_that_are_needed(self):
+    node = ParentNode("a", [ParentNode("p", [LeafNode(None, "a")])])
+    self.assertEqual(node.to_minified_html(), "<a><p>a</p></a>")
+
+    node = ParentNode("div", [ParentNode("p", [LeafNode(None, "a")]), LeafNode(None, "text")])
+    self.assertEqual(node.to_minified_html(), "<div><p>a</p>text</div>")
+
+  def test_streaming_and_raw_nodes_match_tree(self):
+    def blocks():
+      return [ParentNode("p", [LeafNode(None, "a  b")]), ParentNode("ol", [ParentNode("li", [LeafNode(None, "one")])]), ParentNode("p", [LeafNode(None, "c")])]
+
+    expected = ParentNode("div", blocks()).to_minified_html()
+    self.assertEqual(StreamingNode("div", iter(blocks())).to_minified_html(), expected)
+    self.assertEqual(StreamingNode("div", [RawNode(block.to_html()) for block in blocks()]).to_minified_html(), expected)
+
+  def test_write_html_minified(self):
+    sink = io.StringIO()
+    before = minify_stats.bytes_saved
+    ParentNode("ul", [ParentNode("li", [LeafNode(None, "a   b")])]).write_html(sink, minify=True)
+
+    self.assertEqual(sink.getvalue(), "<ul><li>a b</ul>")
+    self.assertEqual(minify_stats.bytes_saved - before, 7)
+
+  def test_escapes_text_and_attributes(self):
+    node = ParentNode("p", [LeafNode(None, "< Back & <forth>"), LeafNode("a", 'say "hi"', {"href": "/?a=1&b=\"2\""})])
+    expected = '<p>&lt; Back &amp; &lt;forth&gt;<a href="/?a=1&amp;b=&quot;2&quot;">say "hi"</a></p>'
+
+    self.assertEqual(node.to_html(), expected)
+    self.assertEqual("".join(node.iter_html()), expected)
+    self.assertEqual(StreamingNode("p", iter(node.children)).to_minified_html(), expected)
+
+  def test_escape_fast_path_returns_same_string(self):
+    text = "nothing special here"
+    self.assertIs(escape_text(text), text)
+    self.assertEqual(escape_text("a&b"), "a&amp;b")
+
+  def test_leaf_span_node(self):
+    source = "see <docs> here"
+    node = LeafSpanNode("b", source, 4, 10)
+
+    self.assertIs(node.source, source)
+    self.assertEqual(node.value, "<docs>")
+    self.assertEqual(node.to_html(), "<b>&lt;docs&gt;</b>")
+    self.assertEqual("".join(node.iter_html()), node.to_html())
+    self.assertFalse(hasattr(node, "__dict__"))
+
+  def test_raw_node_is_not_escaped(self):
+    self.assertEqual(ParentNode("div", [RawNode("<p>a &amp; b</p>")]).to_html(), "<div><p>a &amp; b</p></div>")
+
+  def test_minify_fragments(self):
+    segments = ["<!DOCTYPE html>\n<html>\n  <head>\n    <title>", "</title>\n  </head>\n  <!-- note -->\n  <body>\n    <pre>\n  x\n", "\n</pre>\n    <p>Hi   <b>", "</b>\n</p>\n  </body>\n</html>\n"]
+
+    self.assertEqual(minify_html_fragments(segments), [
+      "<!DOCTYPE html><html><head><title>",
+      "</title></head><body><pre>\n  x\n",
+      "\n</pre><p>Hi <b>",
+      "</b></body></html>",
+    ])
 
 if __name__ == "__main__":
   unittest.main()
\ No newline at end of file
@@ -1,6 +1,15 @@
+import contextlib
+import io
+import os
+import tempfile
 import unittest
 
-from main import extract_title
+from cache import BlockCache
+from main import build_options, extract_title, find_pages, observe_until_title, instrument_build, iter_stale_pages, generate_pages_recursive, template_for, try_build, BuildError
+from manifest import Manifest
+from markdown import set_block_cache
+from siteindex import PageInfo, SiteIndex
+from stats import BuildStats
 
 class TestExtrackTitle(unittest.TestCase):
   def test_one_line(self):
@@ -24,10 +33,210 @@ class TestExtrackTitle(unittest.TestCase):
     with self.assertRaises(Exception):
       extract_title(markdown2)
 
+  def test_observe_until_title(self):
+    blocks = iter(["Intro", "## Subtitle", "# Hello World \nBy Alice", "More"])
+    info = PageInfo()
+    head = observe_until_title(info, blocks)
+
+    self.assertEqual(info.title, "Hello World")
+    self.assertEqual(next(blocks), "More")
+    self.assertEqual(list(head), ["Intro", "## Subtitle", "# Hello World \nBy Alice"])
+
+    with self.assertRaises(Exception):
+      observe_until_title(PageInfo(), ["Intro", "#Subtitle", "Text\n# Not a heading block"])
+
   def test_with_more_whitespaces(self):
     markdown = "#  Hello World  "
 
     self.assertEqual(extract_title(markdown), "Hello World")
 
+class TestBuildOptions(unittest.TestCase):
+  def test_older_renderer_forces_full_rebuild(self):
+    with tempfile.TemporaryDirectory() as tmp:
+      path = os.path.join(tmp, "manifest.json")
+      manifest = Manifest(path, options={"minify": False})
+      manifest.record(__file__, [], [])
+      manifest.save()
+      self.assertEqual(Manifest.load(path, build_options()).stale_reason(__file__), "build options changed")
+
+      manifest = Manifest(path, options=build_options())
+      manifest.record(__file__, [], [])
+      manifest.save()
+      self.assertEqual(Manifest.load(path, build_options()).stale_reason(__file__), None)
+      self.assertEqual(Manifest.load(path, dict(build_options(), render=0)).stale_reason(__file__), "build options changed")
+
+class TestTryBuild(unittest.TestCase):
+  def setUp(self):
+    self.tmp = tempfile.TemporaryDirectory()
+    self.addCleanup(self.tmp.cleanup)
+    self.addCleanup(os.chdir, os.getcwd())
+    os.chdir(self.tmp.name)
+    for name, content in [("template.html", "<title>{{ Title }}</title>{{ Content }}"), ("static/index.css", "body {}"), ("content/index.md", "# Home"), ("public", "")]:
+      os.makedirs(os.path.dirname(name) or ".", exist_ok=True)
+      with open(name, "w") as file:
+        file.write(content)
+
+  def test_errors_outside_pages_are_reported(self):
+    # The static sync cannot copy into public/ while a file is in the way
+    manifest = Manifest(os.path.join(".cache", "manifest.json"))
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+      self.assertFalse(try_build(manifest))
+    self.assertIn("Build failed: NotADirectoryError", output.getvalue())
+
+    os.remove("public")
+    with contextlib.redirect_stdout(io.StringIO()):
+      self.assertTrue(try_build(manifest))
+
+class TestGeneratePagesRecursive(unittest.TestCase):
+  def setUp(self):
+    self.tmp = tempfile.TemporaryDirectory()
+    self.dir = self.tmp.name
+    self.content = os.path.join(self.dir, "content")
+    self.template = self.write("template.html", "<title>{{ Title }}</title><main>{{ Content }}</main>")
+    self.write("content/index.md", "# Home\n\nWelcome **home**")
+    for i in range(4):
+      self.write(f"content/blog/post{i}/index.md", f"# Post {i}\n\n* item _{i}_")
+
+  def tearDown(self):
+    self.tmp.cleanup()
+
+  def write(self, name, content):
+    path = os.path.join(self.dir, name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as file:
+      file.write(content)
+    return path
+
+  def read_tree(self, root):
+    files = {}
+    for from_path, dest_path in find_pages(self.content, root):
+      with open(dest_path, "rb") as file:
+        files[os.path.relpath(dest_path, root)] = file.read()
+    return files
+
+  def test_find_pages_is_sorted(self):
+    pages = find_pages(self.content, "public")
+    self.assertEqual(pages[0], (os.path.join(self.content, "blog", "post0", "index.md"), os.path.join("public", "blog", "post0", "index.html")))
+    self.assertEqual(pages[-1], (os.path.join(self.content, "index.md"), os.path.join("public", "index.html")))
+
+  def test_parallel_matches_serial(self):
+    serial = os.path.join(self.dir, "serial")
+    parallel = os.path.join(self.dir, "parallel")
+    generate_pages_recursive(self.content, self.template, serial, jobs=1)
+    generate_pages_recursive(self.content, self.template, parallel, jobs=3)
+
+    self.assertEqual(len(self.read_tree(serial)), 5)
+    self.assertEqual(self.read_tree(serial), self.read_tree(parallel))
+
+  def test_async_io_matches_serial(self):
+    serial = os.path.join(self.dir, "serial")
+    pipelined = os.path.join(self.dir, "pipelined")
+    generate_pages_recursive(self.content, self.template, serial)
+    generate_pages_recursive(self.content, self.template, pipelined, io_depth=2)
+
+    self.assertEqual(self.read_tree(serial), self.read_tree(pipelined))
+
+  def test_staged_pipeline_matches_serial(self):
+    serial = os.path.join(self.dir, "serial")
+    staged = os.path.join(self.dir, "staged")
+    generate_pages_recursive(self.content, self.template, serial)
+    built = generate_pages_recursive(self.content, self.template, staged, stage_workers={"read": 2, "render": 3, "write": 2})
+
+    self.assertEqual(self.read_tree(serial), self.read_tree(staged))
+    self.assertEqual([from_path for from_path, _ in built], [from_path for from_path, _, _ in iter_stale_pages(self.content, self.template, staged)])
+
+  def test_staged_pipeline_with_disk_cache(self):
+    serial = os.path.join(self.dir, "serial")
+    generate_pages_recursive(self.content, self.template, serial)
+    path = os.path.join(self.dir, "blocks.sqlite")
+    self.addCleanup(set_block_cache, None)
+    for run in range(2):
+      cache = BlockCache(path=path)
+      set_block_cache(cache)
+      staged = os.path.join(self.dir, f"staged{run}")
+      generate_pages_recursive(self.content, self.template, staged, stage_workers={"render": 3})
+      cache.close()
+
+      self.assertEqual(self.read_tree(serial), self.read_tree(staged))
+    self.assertGreater(cache.disk_hits, 0)
+
+  def test_stats_cover_every_stage(self):
+    for io_depth, stage_workers in [(0, None), (2, None), (2, {})]:
+      stats = BuildStats()
+      instrument_build(stats)
+      try:
+        generate_pages_recursive(self.content, self.template, os.path.join(self.dir, "out"), io_depth=io_depth, stage_workers=stage_workers)
+      finally:
+        stats.uninstall()
+
+      for stage in ["read", "parse blocks", "block_to_html_node", "text_to_textnodes", "to_html", "template", "write"]:
+        self.assertIn(stage, stats.stages, (io_depth, stage_workers))
+      self.assertIn(os.path.join(self.content, "index.md"), stats.files)
+
+  def test_site_index_records_pages(self):
+    index = SiteIndex(os.path.join(self.dir, "site.sqlite"))
+    self.addCleanup(index.close)
+    for jobs, io_depth in [(1, 0), (2, 0), (1, 2)]:
+      generate_pages_recursive(self.content, self.template, os.path.join(self.dir, "out"), jobs=jobs, io_depth=io_depth, site_index=index)
+      page = index.find_by_output(os.path.join(self.dir, "out", "blog", "post2", "index.html"))
+
+      self.assertEqual((page["title"], page["words"]), ("Post 2", 6))
+      self.assertEqual(len(index.pages()), 5)
+
+  def test_section_template_rebuilds_only_its_pages(self):
+    out = os.path.join(self.dir, "out")
+    manifest = Manifest(os.path.join(self.dir, "manifest.json"))
+    generate_pages_recursive(self.content, self.template, out, manifest)
+    self.write("content/blog/template.html", "<article>{{ Content }}</article>")
+    manifest.reset()
+
+    pages = list(iter_stale_pages(self.content, self.template, out, manifest))
+
+    self.assertEqual(len(pages), 4)
+    self.assertTrue(all(template_path == os.path.join(self.content, "blog", "template.html") for _, _, template_path in pages))
+    generate_pages_recursive(self.content, self.template, out, manifest)
+    with open(os.path.join(out, "blog", "post0", "index.html")) as file:
+      self.assertEqual(file.read(), "<article><div><h1>Post 0</h1><ul><li>item <i>0</i></li></ul></div></article>")
+
+  def test_shards_cover_every_page_once(self):
+    serial = os.path.join(self.dir, "serial")
+    generate_pages_recursive(self.content, self.template, serial)
+    merged = {}
+    for index in range(1, 4):
+      shard_dir = os.path.join(self.dir, f"shard{index}")
+      built = generate_pages_recursive(self.content, self.template, shard_dir, shard=(index, 3))
+      for _, dest_path in built:
+        relative = os.path.relpath(dest_path, shard_dir)
+        self.assertNotIn(relative, merged)
+        with open(dest_path, "rb") as file:
+          merged[relative] = file.read()
+
+    self.assertEqual(merged, self.read_tree(serial))
+
+  def test_template_for_outside_content(self):
+    self.assertEqual(template_for(os.path.join(self.dir, "elsewhere", "page.md"), self.content, self.template), self.template)
+    self.assertEqual(template_for("page.md", self.content, self.template), self.template)
+
+  def test_failed_page_leaves_no_output(self):
+    self.write("content/index.md", "# Home\n\nUnclosed **bold")
+    out = os.path.join(self.dir, "out")
+    with self.assertRaises(BuildError):
+      generate_pages_recursive(self.content, self.template, out)
+
+    self.assertEqual(sorted(os.listdir(out)), ["blog"])
+
+  def test_errors_are_reported_per_file(self):
+    broken = self.write("content/blog/post1/index.md", "# Post\n\nUnclosed **bold")
+
+    for jobs, io_depth, stage_workers in [(1, 0, None), (2, 0, None), (1, 2, None), (1, 2, {"parse": 2})]:
+      with self.assertRaises(BuildError) as context:
+        generate_pages_recursive(self.content, self.template, os.path.join(self.dir, f"out{jobs}-{io_depth}-{stage_workers}"), jobs=jobs, io_depth=io_depth, stage_workers=stage_workers)
+
+      errors = context.exception.errors
+      self.assertEqual(len(errors), 1)
+      self.assertEqual(errors[0].from_path, broken)
+      self.assertIn(broken, str(context.exception))
+
 if __name__ == "__main__":
   unittest.main()
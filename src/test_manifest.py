@@ -0,0 +1,156 @@
+import json
+import os
+import tempfile
+import unittest
+
+from manifest import Manifest, MANIFEST_VERSION
+
+class TestManifest(unittest.TestCase):
+  def setUp(self):
+    self.tmp = tempfile.TemporaryDirectory()
+    self.dir = self.tmp.name
+    self.manifest_path = os.path.join(self.dir, "manifest.json")
+    self.source = self.write("page.md", "# Page")
+    self.template = self.write("template.html", "{{ Content }}")
+    self.output = self.write("page.html", "<h1>Page</h1>")
+
+  def tearDown(self):
+    self.tmp.cleanup()
+
+  def write(self, name, content):
+    path = os.path.join(self.dir, name)
+    with open(path, "w") as file:
+      file.write(content)
+    return path
+
+  def saved_manifest(self):
+    manifest = Manifest(self.manifest_path)
+    manifest.record(self.source, [self.output], [self.template])
+    manifest.save()
+    return Manifest.load(self.manifest_path)
+
+  def test_unchanged_source_is_fresh(self):
+    manifest = self.saved_manifest()
+    self.assertTrue(manifest.is_fresh(self.source, [self.template]))
+
+  def test_unchanged_stat_skips_hashing(self):
+    manifest = self.saved_manifest()
+    manifest.is_fresh(self.source, [self.template])
+    self.assertNotIn(self.source, manifest.hashes)
+
+  def test_touched_source_is_fresh(self):
+    manifest = self.saved_manifest()
+    os.utime(self.source, (0, 0))
+    self.assertTrue(manifest.is_fresh(self.source, [self.template]))
+
+  def test_changed_source_is_stale(self):
+    manifest = self.saved_manifest()
+    self.write("page.md", "# Changed")
+    self.assertFalse(manifest.is_fresh(self.source, [self.template]))
+
+  def test_changed_template_is_stale(self):
+    manifest = self.saved_manifest()
+    self.write("template.html", "<main>{{ Content }}</main>")
+    self.assertFalse(manifest.is_fresh(self.source, [self.template]))
+
+  def test_different_template_is_stale(self):
+    manifest = self.saved_manifest()
+    other_template = self.write("other.html", "{{ Content }}")
+    self.assertFalse(manifest.is_fresh(self.source, [other_template]))
+
+  def test_missing_output_is_stale(self):
+    manifest = self.saved_manifest()
+    os.remove(self.output)
+    self.assertFalse(manifest.is_fresh(self.source, [self.template]))
+
+  def test_stale_reason_names_the_dependency(self):
+    partial = self.write("nav.html", "<nav></nav>")
+    image = self.write("image.png", "png")
+    manifest = Manifest(self.manifest_path)
+    manifest.record_includes({self.template: [partial]})
+    manifest.record(self.source, [self.output], [self.template], [image])
+
+    self.assertEqual(manifest.stale_reason(self.source, [self.template]), None)
+    self.write("nav.html", "<nav>Home</nav>")
+    manifest.reset()
+    self.assertEqual(manifest.stale_reason(self.source, [self.template]), f"{self.template} -> {partial} changed")
+    os.remove(image)
+    self.assertEqual(manifest.stale_reason(self.source, [self.template]), f"{image} was removed")
+    self.assertEqual(manifest.stale_reason(self.source, [partial]), f"now depends on {partial}")
+
+  def test_invalidated_pages(self):
+    partial = self.write("nav.html", "<nav></nav>")
+    other = self.write("other.md", "# Other")
+    manifest = Manifest(self.manifest_path)
+    manifest.record_includes({self.template: [partial]})
+    manifest.record(self.source, [self.output], [self.template])
+    manifest.record(other, [self.output])
+
+    self.assertEqual(manifest.invalidated([partial]), [self.source])
+
+  def test_graph_survives_save(self):
+    partial = self.write("nav.html", "<nav></nav>")
+    manifest = Manifest(self.manifest_path)
+    manifest.record_includes({self.template: [partial]})
+    manifest.record(self.source, [self.output], [self.template])
+    manifest.save()
+
+    self.assertEqual(Manifest.load(self.manifest_path).graph.closure(self.source), sorted([partial, self.template]))
+
+  def test_remove_stale_deletes_outputs(self):
+    manifest = self.saved_manifest()
+    removed = manifest.remove_stale()
+
+    self.assertEqual(removed, [self.output])
+    self.assertFalse(os.path.exists(self.output))
+    self.assertEqual(manifest.entries, {})
+
+  def test_corrupted_manifest_is_discarded(self):
+    self.saved_manifest()
+    with open(self.manifest_path, "r") as file:
+      data = json.load(file)
+    data["entries"][self.source]["hash"] = "0" * 64
+    with open(self.manifest_path, "w") as file:
+      json.dump(data, file)
+
+    self.assertEqual(Manifest.load(self.manifest_path).entries, {})
+
+  def test_unreadable_manifest_is_discarded(self):
+    self.write("manifest.json", "{not json")
+    self.assertEqual(Manifest.load(self.manifest_path).entries, {})
+
+  def test_changed_options_rebuild_everything(self):
+    manifest = Manifest(self.manifest_path, options={"minify": False})
+    manifest.record(self.source, [self.output], [self.template])
+    manifest.save()
+
+    self.assertTrue(Manifest.load(self.manifest_path, {"minify": False}).is_fresh(self.source, [self.template]))
+    manifest = Manifest.load(self.manifest_path, {"minify": True})
+    self.assertEqual(manifest.stale_reason(self.source, [self.template]), "build options changed")
+
+    # An entry that is not rebuilt keeps its mark, a failed page is not fresh next time
+    manifest.save()
+    self.assertFalse(Manifest.load(self.manifest_path, {"minify": True}).is_fresh(self.source, [self.template]))
+
+  def test_changed_options_still_remove_deleted_sources(self):
+    manifest = Manifest(self.manifest_path, options={"minify": False})
+    manifest.record(self.source, [self.output], [self.template])
+    manifest.save()
+    os.remove(self.source)
+
+    manifest = Manifest.load(self.manifest_path, {"minify": True})
+    self.assertEqual(manifest.remove_stale(), [self.output])
+    self.assertFalse(os.path.exists(self.output))
+
+  def test_version_mismatch_is_discarded(self):
+    self.saved_manifest()
+    with open(self.manifest_path, "r") as file:
+      data = json.load(file)
+    data["version"] = MANIFEST_VERSION + 1
+    with open(self.manifest_path, "w") as file:
+      json.dump(data, file)
+
+    self.assertEqual(Manifest.load(self.manifest_path).entries, {})
+
+if __name__ == "__main__":
+  unittest.main()
@@ -1,6 +1,10 @@
 import unittest
 
-from markdown import markdown_to_blocks, markdown_to_html_node, BlockType, block_to_block_type
+import io
+
+import markdown
+
+from markdown import markdown_to_blocks, markdown_to_html_node, BlockType, block_to_block_type, iter_markdown_blocks, markdown_lines_to_html_node, classify_block, ordered_list_to_html_node, ORDERED_PREFIXES, unordered_list_to_html_node
 
 class TestMarkdownToBlock(unittest.TestCase):
   def test_single_block(self):
@@ -57,7 +61,53 @@ This is a paragraph of text. It has some **bold** and _italic_ words inside of i
 
     self.assertEqual(blocks, expected_blocks)
 
+class TestIterMarkdownBlocks(unittest.TestCase):
+  def test_matches_markdown_to_blocks(self):
+    texts = [
+      "",
+      "Hello world",
+      "Hello world\n\nThis is a new block",
+      "# Heading\n\n\nParagraph\n\n\n\n* item\n* item\n\n",
+      "\n\n  indented\n  \nstill the same block\n\n   \n\nlast",
+      "a\r\n\r\nb",
+      "---\ntitle: Post\n---\n# Heading\n\nBody",
+      "---\nnot closed\n\nBody",
+    ]
+
+    for text in texts:
+      self.assertEqual(list(iter_markdown_blocks(io.StringIO(text))), markdown_to_blocks(text), repr(text))
+
+  def test_lazy(self):
+    lines = iter(["# Heading\n", "\n", "Paragraph\n"])
+    blocks = iter_markdown_blocks(lines)
+
+    self.assertEqual(next(blocks), "# Heading")
+    self.assertEqual(next(lines), "Paragraph\n")
+
+  def test_front_matter_is_skipped(self):
+    self.assertEqual(markdown_to_blocks("---\ndate: today\n---\n\n# Heading\n\nBody"), ["# Heading", "Body"])
+    self.assertEqual(markdown_to_blocks("---\nnot closed\n\nBody"), ["---\nnot closed", "Body"])
+
+  def test_front_matter_after_whitespace_matches_streaming(self):
+    for md in ["  ---\ndate: today\n---  \n\n# Heading", "---\n\n# Heading", "  ---"]:
+      self.assertEqual(markdown_to_blocks(md), list(iter_markdown_blocks(io.StringIO(md))), md)
+    self.assertEqual(markdown_to_blocks("  ---\ndate: today\n---  \n\n# Heading"), ["# Heading"])
+
+class TestMarkdownLinesToHtmlNode(unittest.TestCase):
+  def test_matches_markdown_to_html_node(self):
+    md = "# Main Title\n\nThis is a paragraph with some _italic_ and **bold** text.\n\n* First item\n* Second item\n\n```\ncode\nmore code\n```\n"
+
+    self.assertEqual(markdown_lines_to_html_node(io.StringIO(md)).to_html(), markdown_to_html_node(md).to_html())
+
 class TestMarkdownToHtmlNode(unittest.TestCase):
+  def test_text_spans(self):
+    md = "# Title\n\nSome **bold** and _italic_ text\n\n- a [link](/a)\n\n```\ncode <b>\n```"
+    expected = markdown_to_html_node(md).to_html()
+    markdown.set_text_spans(True)
+    self.addCleanup(markdown.set_text_spans, False)
+
+    self.assertEqual(markdown_to_html_node(md).to_html(), expected)
+
   def test_single_paragraph(self):
     md = """
 This is **bolded** paragraph
@@ -123,6 +173,43 @@ def hello():
         "<div><blockquote>This is a quote block with multiple lines and some <b>bold</b> text</blockquote></div>",
     )
 
+class TestClassifyBlock(unittest.TestCase):
+  def test_unordered_list(self):
+    block = "* one\n- two"
+    self.assertEqual(classify_block(block), (BlockType.UNORDERED_LIST, ["* one", "- two"], [2, 2]))
+
+  def test_ordered_list_offsets(self):
+    lines = [f"{i + 1}. item {i + 1}" for i in range(11)]
+    block_type, split_lines, offsets = classify_block("\n".join(lines))
+
+    self.assertEqual(block_type, BlockType.ORDERED_LIST)
+    self.assertEqual(split_lines, lines)
+    self.assertEqual(offsets, [3] * 9 + [4, 4])
+
+  def test_ordered_list_past_prefix_table(self):
+    count = len(ORDERED_PREFIXES) + 5
+    block_type, _, offsets = classify_block("\n".join(f"{i + 1}. item" for i in range(count)))
+
+    self.assertEqual(block_type, BlockType.ORDERED_LIST)
+    self.assertEqual(offsets[-1], len(f"{count}. "))
+    self.assertEqual(block_to_block_type("1. one\n" * (count - 1) + "1. one"), BlockType.PARAGRAPH)
+
+  def test_long_ordered_list_html(self):
+    block = "\n".join(f"{i + 1}. item" for i in range(10))
+    node = ordered_list_to_html_node(block)
+
+    self.assertEqual(node.to_html(), "<ol>" + "<li>item</li>" * 10 + "</ol>")
+
+  def test_paragraph_and_quote_keep_lines(self):
+    self.assertEqual(classify_block("1. one\n3. three"), (BlockType.PARAGRAPH, ["1. one", "3. three"], None))
+    self.assertEqual(classify_block("> a\n> b"), (BlockType.QUOTE, ["> a", "> b"], None))
+
+  def test_renderers_validate_without_lines(self):
+    with self.assertRaises(ValueError):
+      unordered_list_to_html_node("* one\ntwo")
+    with self.assertRaises(ValueError):
+      ordered_list_to_html_node("1. one\n3. three")
+
 class TestBlockToBlockType(unittest.TestCase):
   def test_heading_block(self):
     block = "# This is a heading"
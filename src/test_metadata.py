@@ -0,0 +1,84 @@
+import os
+import tempfile
+import unittest
+
+from metadata import MetadataCache, PageMeta, scan_page
+
+class TestScanPage(unittest.TestCase):
+  def setUp(self):
+    self.tmp = tempfile.TemporaryDirectory()
+
+  def tearDown(self):
+    self.tmp.cleanup()
+
+  def write(self, name, content, mtime=None):
+    path = os.path.join(self.tmp.name, name)
+    with open(path, "w") as file:
+      file.write(content)
+    if mtime != None:
+      os.utime(path, (mtime, mtime))
+    return path
+
+  def test_front_matter_and_title(self):
+    path = self.write("post.md", "---\ndate: 2024-01-02\ntags: 'lotr, elves'\n---\n\nIntro with # no heading\n\n# The Title\n\nBody")
+    self.assertEqual(scan_page(path), PageMeta(path, "The Title", {"date": "2024-01-02", "tags": "lotr, elves"}))
+
+  def test_without_front_matter(self):
+    path = self.write("post.md", "# Title\n\n---\n")
+    self.assertEqual(scan_page(path), PageMeta(path, "Title", {}))
+
+  def test_title_is_only_the_heading_line(self):
+    path = self.write("post.md", "# My Post\nBy Alice\n\nBody")
+    self.assertEqual(scan_page(path).title, "My Post")
+
+  def test_read_is_bounded(self):
+    path = self.write("post.md", "---\ndate: today\n---\n" + "word " * 2000 + "\n\n# Late Title\n")
+
+    self.assertEqual(scan_page(path, max_bytes=1024), PageMeta(path, None, {"date": "today"}))
+    self.assertEqual(scan_page(path, max_bytes=20000).title, "Late Title")
+
+  def test_cut_off_line_is_ignored(self):
+    path = self.write("post.md", "# A very long title that does not fit\n")
+    self.assertEqual(scan_page(path, max_bytes=10).title, None)
+
+class TestMetadataCache(unittest.TestCase):
+  def setUp(self):
+    self.tmp = tempfile.TemporaryDirectory()
+    self.cache_path = os.path.join(self.tmp.name, "cache", "metadata.json")
+    self.page = os.path.join(self.tmp.name, "page.md")
+    self.write("# First", 1000)
+
+  def tearDown(self):
+    self.tmp.cleanup()
+
+  def write(self, content, mtime):
+    with open(self.page, "w") as file:
+      file.write(content)
+    os.utime(self.page, (mtime, mtime))
+
+  def test_cached_by_size_and_mtime(self):
+    cache = MetadataCache(self.cache_path)
+    self.assertEqual(cache.get(self.page).title, "First")
+
+    self.write("# Other", 1000)
+    self.assertEqual(cache.get(self.page).title, "First")
+    self.assertEqual(cache.scans, 1)
+
+    self.write("# Other", 2000)
+    self.assertEqual(cache.get(self.page).title, "Other")
+    self.assertEqual(cache.scans, 2)
+
+  def test_persisted_between_runs(self):
+    cache = MetadataCache(self.cache_path)
+    cache.scan([self.page])
+    cache.save()
+
+    reloaded = MetadataCache(self.cache_path)
+    self.assertEqual(reloaded.scan([self.page]), [PageMeta(self.page, "First", {})])
+    self.assertEqual(reloaded.scans, 0)
+
+    os.remove(self.page)
+    self.assertEqual(reloaded.prune(), [self.page])
+
+if __name__ == "__main__":
+  unittest.main()
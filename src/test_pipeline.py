@@ -0,0 +1,118 @@
+import argparse
+import os
+import tempfile
+import time
+import unittest
+
+from pipeline import BackgroundWriter, Stage, format_stage_report, parse_stage_workers, prefetch, run_stages
+
+class TestPrefetch(unittest.TestCase):
+  def test_keeps_order(self):
+    results = list(prefetch(range(20), lambda item: item * 2, depth=3))
+    self.assertEqual(results, [(item, item * 2, None) for item in range(20)])
+
+  def test_reports_load_errors(self):
+    def load(item):
+      if item == 1:
+        raise ValueError("broken")
+      return item
+
+    results = list(prefetch([0, 1, 2], load))
+    self.assertEqual([item for item, _, _ in results], [0, 1, 2])
+    self.assertIsInstance(results[1][2], ValueError)
+    self.assertIsNone(results[2][2])
+
+  def test_raises_producer_errors(self):
+    def items():
+      yield 0
+      raise OSError("walk failed")
+
+    with self.assertRaises(OSError):
+      list(prefetch(items(), lambda item: item))
+
+  def test_bounded(self):
+    loaded = []
+    results = prefetch(range(100), lambda item: loaded.append(item) or item, depth=2)
+    next(results)
+    time.sleep(0.1)
+
+    # One item consumed, two queued and at most one more loaded while waiting to be queued
+    self.assertLessEqual(len(loaded), 4)
+    results.close()
+
+class TestBackgroundWriter(unittest.TestCase):
+  def test_writes_and_reports_errors(self):
+    with tempfile.TemporaryDirectory() as tmp:
+      path = os.path.join(tmp, "a", "index.html")
+      blocked = os.path.join(tmp, "file")
+      with open(blocked, "w") as file:
+        file.write("not a directory")
+
+      writer = BackgroundWriter(depth=1)
+      writer.write(path, "<p>a</p>", "a.md")
+      writer.write(os.path.join(blocked, "index.html"), "<p>b</p>", "b.md")
+      errors = writer.close()
+
+      with open(path, "r") as file:
+        self.assertEqual(file.read(), "<p>a</p>")
+      self.assertEqual(list(errors), ["b.md"])
+
+class TestRunStages(unittest.TestCase):
+  def test_runs_every_stage(self):
+    stages = [Stage("double", lambda item: item * 2, workers=3), Stage("add", lambda item: item + 1, workers=2)]
+    results = list(run_stages(range(50), stages, depth=2))
+
+    self.assertEqual(sorted(results), [(item, item * 2 + 1, None) for item in range(50)])
+    self.assertEqual([stage.items for stage in stages], [50, 50])
+
+  def test_failed_items_skip_later_stages(self):
+    def check(item):
+      if item == 1:
+        raise ValueError("broken")
+      return item
+
+    stages = [Stage("check", check), Stage("after", lambda item: item * 10)]
+    results = sorted(run_stages([0, 1, 2], stages), key=lambda result: result[0])
+
+    self.assertEqual([result for _, result, _ in results], [0, 1, 20])
+    self.assertIsInstance(results[1][2], ValueError)
+    self.assertEqual((stages[0].errors, stages[1].items), (1, 2))
+
+  def test_raises_producer_errors(self):
+    def items():
+      yield 0
+      raise OSError("walk failed")
+
+    with self.assertRaises(OSError):
+      list(run_stages(items(), [Stage("same", lambda item: item)]))
+
+  def test_backpressure(self):
+    loaded = []
+    results = run_stages(range(100), [Stage("load", lambda item: loaded.append(item) or item)], depth=2)
+    next(results)
+    time.sleep(0.1)
+
+    # Two queued on each side of the stage, one in the stage and one waiting to be queued by the source
+    self.assertLessEqual(len(loaded), 6)
+    results.close()
+
+  def test_report_marks_bottleneck(self):
+    fast = Stage("fast", workers=2)
+    slow = Stage("slow")
+    for _ in range(4):
+      fast.record(0.01)
+      slow.record(0.01)
+
+    lines = format_stage_report([fast, slow]).splitlines()
+    self.assertTrue(lines[2].startswith("slow") and lines[2].endswith("<- bottleneck"))
+    self.assertNotIn("bottleneck", lines[1])
+
+  def test_parse_stage_workers(self):
+    self.assertEqual(parse_stage_workers("read=2,write=4"), {"read": 2, "write": 4})
+    self.assertEqual(parse_stage_workers(""), {})
+    for text in ["read", "read=0", "read=x"]:
+      with self.assertRaises(argparse.ArgumentTypeError):
+        parse_stage_workers(text)
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,41 @@
+import os
+import tempfile
+import threading
+import unittest
+import urllib.request
+
+from server import ReloadServer, RELOAD_SCRIPT
+
+class TestReloadServer(unittest.TestCase):
+  def setUp(self):
+    self.tmp = tempfile.TemporaryDirectory()
+    with open(os.path.join(self.tmp.name, "index.html"), "w") as file:
+      file.write("<html><body><p>Home</p></body></html>")
+    with open(os.path.join(self.tmp.name, "index.css"), "w") as file:
+      file.write("body {}")
+    self.server = ReloadServer(self.tmp.name, 0)
+    self.server.start()
+    self.url = f"http://localhost:{self.server.httpd.server_address[1]}"
+
+  def tearDown(self):
+    self.server.stop()
+    self.tmp.cleanup()
+
+  def get(self, path):
+    with urllib.request.urlopen(self.url + path, timeout=5) as response:
+      return response.read()
+
+  def test_injects_reload_script(self):
+    html = self.get("/")
+    self.assertEqual(html, b"<html><body><p>Home</p>" + RELOAD_SCRIPT + b"</body></html>")
+
+  def test_serves_other_files_unchanged(self):
+    self.assertEqual(self.get("/index.css"), b"body {}")
+
+  def test_reload_event(self):
+    with urllib.request.urlopen(self.url + "/__reload", timeout=5) as response:
+      threading.Timer(0.05, self.server.notify_reload).start()
+      self.assertEqual(response.readline(), b"data: reload\n")
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,124 @@
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+
+import main
+from shard import MergeError, find_shard_manifests, merge_shards, parse_shard, plan_merge, shard_of, write_shard_manifest
+
+class TestShardAssignment(unittest.TestCase):
+  def test_parse_shard(self):
+    self.assertEqual(parse_shard("2/4"), (2, 4))
+    for text in ["0/4", "5/4", "1", "a/b", "1/0"]:
+      with self.assertRaises(argparse.ArgumentTypeError):
+        parse_shard(text)
+
+  def test_assignment_is_stable_and_spread(self):
+    paths = [f"blog/post{i}/index.md" for i in range(200)]
+    shards = [shard_of(path, 4) for path in paths]
+
+    self.assertEqual(shards, [shard_of(path, 4) for path in paths])
+    self.assertEqual(shard_of("blog/post1/index.md", 4), shard_of(os.path.join("blog", "post1", "index.md"), 4))
+    self.assertEqual(sorted(set(shards)), [1, 2, 3, 4])
+    self.assertTrue(all(count > 25 for count in map(shards.count, [1, 2, 3, 4])))
+
+class TestMerge(unittest.TestCase):
+  def setUp(self):
+    self.tmp = tempfile.TemporaryDirectory()
+    self.dir = self.tmp.name
+    self.shards = os.path.join(self.dir, "shards")
+    self.public = os.path.join(self.dir, "public")
+    self.state = os.path.join(self.dir, "merged.json")
+
+  def tearDown(self):
+    self.tmp.cleanup()
+
+  def write(self, name, content):
+    path = os.path.join(self.dir, name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as file:
+      file.write(content)
+    return path
+
+  def build_shard(self, index, count, pages):
+    shard_dir = os.path.join(self.shards, f"{index}-of-{count}")
+    outputs = {}
+    for relative, content in pages.items():
+      outputs[f"content/{relative}.md"] = self.write(f"shards/{index}-of-{count}/public/{relative}.html", content)
+    write_shard_manifest(shard_dir, (index, count), outputs, set(outputs))
+
+  def read(self, relative):
+    with open(os.path.join(self.public, relative)) as file:
+      return file.read()
+
+  def test_merge_copies_only_changed_pages(self):
+    self.build_shard(1, 2, {"index": "home", "blog/a": "a"})
+    self.build_shard(2, 2, {"blog/b": "b"})
+    plan = plan_merge(find_shard_manifests(self.shards), {"index.html", "blog/a.html", "blog/b.html"})
+
+    self.assertEqual(merge_shards(plan, self.public, self.state), ["blog/a.html", "blog/b.html", "index.html"])
+    self.assertEqual(self.read("blog/b.html"), "b")
+
+    self.build_shard(2, 2, {"blog/b": "b2", "blog/c": "c"})
+    self.build_shard(1, 2, {"index": "home"})
+    plan = plan_merge(find_shard_manifests(self.shards))
+
+    self.assertEqual(merge_shards(plan, self.public, self.state), ["blog/b.html", "blog/c.html"])
+    self.assertEqual(self.read("blog/b.html"), "b2")
+    self.assertFalse(os.path.exists(os.path.join(self.public, "blog", "a.html")))
+
+  def test_verification(self):
+    self.build_shard(1, 3, {"index": "home", "blog/a": "a"})
+    self.build_shard(2, 3, {"blog/a": "a"})
+    self.write("static/index.html", "static")
+
+    with self.assertRaises(MergeError) as context:
+      plan_merge(find_shard_manifests(self.shards), {"index.html", "blog/a.html", "blog/b.html"}, os.path.join(self.dir, "static"))
+
+    self.assertEqual(context.exception.problems, [
+      "Shard 3/3 is missing",
+      f"blog/a.html is built by both {os.path.join(self.shards, '1-of-3')} and {os.path.join(self.shards, '2-of-3')}",
+      "blog/b.html is not built by any shard",
+      "index.html is both a page and a static file",
+    ])
+
+class TestShardCommandLine(unittest.TestCase):
+  def setUp(self):
+    self.tmp = tempfile.TemporaryDirectory()
+    self.addCleanup(self.tmp.cleanup)
+    self.addCleanup(os.chdir, os.getcwd())
+    self.addCleanup(main.set_block_cache, None)
+    os.chdir(self.tmp.name)
+    for name, content in [("template.html", "<title>{{ Title }}</title>{{ Content }}"), ("static/index.css", "body {}"), ("content/index.md", "# Home"), ("content/blog/index.md", "# Blog")]:
+      os.makedirs(os.path.dirname(name) or ".", exist_ok=True)
+      with open(name, "w") as file:
+        file.write(content)
+
+  def run_main(self, argv):
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output), contextlib.redirect_stderr(output):
+      try:
+        main.main(argv)
+      except SystemExit as e:
+        return e.code, output.getvalue()
+    return 0, output.getvalue()
+
+  def test_shard_rejects_compress(self):
+    self.assertEqual(self.run_main(["--shard", "1/2", "--compress"])[0], 2)
+
+  def test_shard_uses_block_cache(self):
+    self.assertEqual(self.run_main(["--shard", "1/2", "--block-cache"])[0], 0)
+    self.assertTrue(os.path.exists(main.BLOCK_CACHE_PATH))
+
+  def test_failed_merge_lists_problems(self):
+    self.run_main(["--shard", "1/2"])
+    status, output = self.run_main(["merge"])
+
+    self.assertEqual(status, 1)
+    self.assertIn("Shard 2/2 is missing", output)
+    self.assertNotIn("Traceback", output)
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,71 @@
+import os
+import tempfile
+import unittest
+
+from siteindex import PageInfo, SiteIndex
+
+class TestPageInfo(unittest.TestCase):
+  def test_observe_passes_blocks_through(self):
+    info = PageInfo("content/index.md", "public/index.html", "Home")
+    blocks = ["# Home", "Read [the post](/blog/post) and ![logo](/logo.png)", "```\n[not](/a/link)\n```"]
+
+    self.assertEqual(list(info.observe(blocks)), blocks)
+    self.assertEqual(info.words, 10)
+    self.assertEqual(info.links, ["/blog/post"])
+
+  def test_observe_takes_title_from_first_heading(self):
+    info = PageInfo("content/index.md", "public/index.html")
+    list(info.observe(["Intro # not a title", "## Sub", "# Home\nBy Alice", "# Later"]))
+
+    self.assertEqual(info.title, "Home")
+
+class TestSiteIndex(unittest.TestCase):
+  def setUp(self):
+    self.tmp = tempfile.TemporaryDirectory()
+    self.index = SiteIndex(os.path.join(self.tmp.name, "cache", "site.sqlite"))
+
+  def tearDown(self):
+    self.index.close()
+    self.tmp.cleanup()
+
+  def page(self, source, output, title, links):
+    info = PageInfo(source, output, title)
+    info.words = 10
+    info.links = links
+    return info
+
+  def test_update_and_query(self):
+    self.index.update(self.page("content/index.md", "public/index.html", "Home", ["/blog/a", "/blog/b"]), "h1", 1.0)
+    self.index.update(self.page("content/blog/a.md", "public/blog/a.html", "A", ["/blog/b"]), "h2", 2.0)
+
+    self.assertTrue(self.index.contains("content/index.md"))
+    self.assertEqual(self.index.get("content/index.md")["links"], ["/blog/a", "/blog/b"])
+    self.assertEqual(self.index.find_by_output("public/blog/a.html")["title"], "A")
+    self.assertEqual([page["source"] for page in self.index.pages("content/blog/")], ["content/blog/a.md"])
+    self.assertEqual(self.index.backlinks("/blog/b"), ["content/blog/a.md", "content/index.md"])
+    self.assertEqual(self.index.get("content/missing.md"), None)
+
+  def test_update_replaces_links(self):
+    self.index.update(self.page("content/index.md", "public/index.html", "Home", ["/old"]), "h1")
+    self.index.update(self.page("content/index.md", "public/index.html", "Home 2", ["/new"]), "h2")
+
+    self.assertEqual(self.index.get("content/index.md")["title"], "Home 2")
+    self.assertEqual(self.index.backlinks("/old"), [])
+
+  def test_prune_removes_missing_sources(self):
+    self.index.update(self.page("content/index.md", "public/index.html", "Home", []), "h1")
+    self.index.update(self.page("content/gone.md", "public/gone.html", "Gone", ["/"]), "h2")
+
+    self.assertEqual(self.index.prune(["content/index.md"]), ["content/gone.md"])
+    self.assertFalse(self.index.contains("content/gone.md"))
+    self.assertEqual(self.index.backlinks("/"), [])
+
+  def test_persists_across_connections(self):
+    self.index.update(self.page("content/index.md", "public/index.html", "Home", []), "h1")
+    self.index.close()
+    self.index = SiteIndex(self.index.path)
+
+    self.assertEqual(self.index.get("content/index.md")["hash"], "h1")
+
+if __name__ == "__main__":
+  unittest.main()
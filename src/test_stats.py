@@ -0,0 +1,113 @@
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+import markdown
+import textnode
+from markdown import markdown_to_html_node
+from stats import BuildStats, TimedFile
+
+class TestBuildStats(unittest.TestCase):
+  def test_add(self):
+    stats = BuildStats()
+    stats.add("page", 1.0, 1.5, "a.md")
+    stats.add("page", 2.0, 2.25, "b.md")
+
+    self.assertEqual(stats.stages["page"], (2, 0.75))
+    self.assertEqual(stats.files, {"a.md": 0.5, "b.md": 0.25})
+    self.assertIsNone(stats.events)
+
+  def test_instrument_and_uninstall(self):
+    original = textnode.text_to_textnodes
+    stats = BuildStats()
+    stats.instrument(original, "text_to_textnodes")
+
+    self.assertIsNot(markdown.text_to_textnodes, original)
+    markdown_to_html_node("# Title\n\nSome **bold** text")
+    self.assertEqual(stats.stages["text_to_textnodes"][0], 2)
+
+    stats.uninstall()
+    self.assertIs(markdown.text_to_textnodes, original)
+    self.assertIs(textnode.text_to_textnodes, original)
+
+  def test_nested_stages_are_exclusive(self):
+    stats = BuildStats()
+    inner = stats.wrap(lambda: time.sleep(0.02), "inner")
+    outer = stats.wrap(lambda path: inner(), "outer", 0)
+    outer("page.md")
+
+    self.assertGreaterEqual(stats.stages["inner"][1], 0.02)
+    self.assertLess(stats.stages["outer"][1], 0.01)
+    self.assertGreaterEqual(stats.files["page.md"], 0.02)
+
+  def test_generator_steps_count_as_one_call(self):
+    stats = BuildStats()
+    def numbers():
+      yield 1
+      yield 2
+
+    self.assertEqual(list(stats.wrap(numbers, "numbers")()), [1, 2])
+    self.assertEqual(stats.stages["numbers"][0], 1)
+
+  def test_timed_file(self):
+    stats = BuildStats()
+    with tempfile.TemporaryDirectory() as tmp:
+      path = os.path.join(tmp, "page.md")
+      with TimedFile(open(path, "w"), stats, "write") as file:
+        file.write("a\n")
+        file.write("b\n")
+      with TimedFile(open(path, "r"), stats, "read") as file:
+        self.assertEqual(list(file), ["a\n", "b\n"])
+
+    self.assertEqual((stats.stages["write"][0], stats.stages["read"][0]), (1, 1))
+
+  def test_report(self):
+    stats = BuildStats()
+    stats.add("generate_page", 0.0, 0.002, "slow.md")
+    stats.add("generate_page", 0.0, 0.001, "fast.md")
+    report = stats.report(slowest=1)
+
+    self.assertIn("generate_page", report)
+    self.assertIn("slow.md", report)
+    self.assertNotIn("fast.md", report)
+
+  def test_counters(self):
+    stats = BuildStats()
+    stats.count("minify bytes saved", 10)
+    stats.count("minify bytes saved", 5)
+
+    self.assertIn(f"{'minify bytes saved':<24}{15:>8}", stats.report())
+    stats.reset()
+    self.assertNotIn("minify", stats.report())
+
+  def test_counters_from_threads(self):
+    stats = BuildStats()
+    def count():
+      for _ in range(10000):
+        stats.count("blocks", 1)
+    threads = [threading.Thread(target=count) for _ in range(4)]
+    for thread in threads:
+      thread.start()
+    for thread in threads:
+      thread.join()
+
+    self.assertEqual(stats.counters["blocks"], 40000)
+
+  def test_write_trace(self):
+    stats = BuildStats(trace=True)
+    stats.add("generate_page", stats.origin, stats.origin + 0.001, "page.md")
+    with tempfile.TemporaryDirectory() as tmp:
+      path = os.path.join(tmp, "trace.json")
+      stats.write_trace(path)
+      with open(path, "r") as file:
+        events = json.load(file)["traceEvents"]
+
+    self.assertEqual(len(events), 1)
+    self.assertEqual(events[0]["name"], "generate_page")
+    self.assertEqual(events[0]["args"], {"path": "page.md"})
+
+if __name__ == "__main__":
+  unittest.main()
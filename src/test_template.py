@@ -0,0 +1,108 @@
+import io
+import os
+import tempfile
+import unittest
+
+from htmlnode import LeafNode, ParentNode
+from template import compile_template, load_template
+
+class TestCompileTemplate(unittest.TestCase):
+  def test_segments_and_slots(self):
+    template = compile_template("<title>{{ Title }}</title><main>{{ Content }}</main>")
+
+    self.assertEqual(template.segments, ["<title>", "</title><main>", "</main>"])
+    self.assertEqual(template.slots, ["Title", "Content"])
+
+  def test_no_placeholders(self):
+    template = compile_template("<p>static</p>")
+
+    self.assertEqual(template.render({}), "<p>static</p>")
+
+  def test_render(self):
+    template = compile_template("<title>{{ Title }}</title>{{Content}}")
+
+    self.assertEqual(template.render({"Title": "Hi", "Content": "<p>Body</p>"}), "<title>Hi</title><p>Body</p>")
+
+  def test_render_arbitrary_placeholders(self):
+    template = compile_template("{{ Date }} - {{ Description }} - {{ Date }}")
+
+    self.assertEqual(template.render({"Date": "2024-01-01", "Description": "Post"}), "2024-01-01 - Post - 2024-01-01")
+
+  def test_values_are_not_expanded(self):
+    template = compile_template("{{ Title }}|{{ Content }}")
+
+    self.assertEqual(template.render({"Title": "{{ Content }}", "Content": "x"}), "{{ Content }}|x")
+
+  def test_write_streams_nodes(self):
+    template = compile_template("<title>{{ Title }}</title>{{ Content }}")
+    content = ParentNode("p", [LeafNode("b", "Body")])
+    sink = io.StringIO()
+    template.write(sink, {"Title": "Hi", "Content": content})
+
+    self.assertEqual(sink.getvalue(), "<title>Hi</title><p><b>Body</b></p>")
+    self.assertEqual(template.render({"Title": "Hi", "Content": content}), sink.getvalue())
+
+  def test_minified(self):
+    template = compile_template("<html>\n  <body>\n    <article>{{ Content }}</article>\n  </body>\n</html>\n", minify=True)
+    content = ParentNode("div", [ParentNode("p", [LeafNode(None, "spaced   out")])])
+    sink = io.StringIO()
+    template.write(sink, {"Content": content})
+
+    self.assertEqual(template.segments, ["<html><body><article>", "</article></body></html>"])
+    self.assertEqual(sink.getvalue(), "<html><body><article><div><p>spaced out</div></article></body></html>")
+    self.assertEqual(template.render({"Content": content}), sink.getvalue())
+
+  def test_missing_value(self):
+    template = compile_template("{{ Title }}")
+
+    with self.assertRaises(ValueError):
+      template.render({})
+
+class TestLoadTemplate(unittest.TestCase):
+  def setUp(self):
+    self.tmp = tempfile.TemporaryDirectory()
+    self.path = os.path.join(self.tmp.name, "template.html")
+
+  def tearDown(self):
+    self.tmp.cleanup()
+
+  def write(self, content, mtime, name="template.html"):
+    path = os.path.join(self.tmp.name, name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as file:
+      file.write(content)
+    os.utime(path, (mtime, mtime))
+    return path
+
+  def test_cached_until_modified(self):
+    self.write("<p>{{ Content }}</p>", 1000)
+    template = load_template(self.path)
+
+    self.assertIs(load_template(self.path), template)
+
+    self.write("<div>{{ Content }}</div>", 2000)
+    reloaded = load_template(self.path)
+
+    self.assertIsNot(reloaded, template)
+    self.assertEqual(reloaded.render({"Content": "x"}), "<div>x</div>")
+
+  def test_includes_partials(self):
+    nav = self.write("<nav>{{> links.html }}</nav>", 1000, "partials/nav.html")
+    links = self.write("<a>{{ Title }}</a>", 1000, "partials/links.html")
+    self.write("{{> partials/nav.html }}<main>{{ Content }}</main>", 1000)
+    template = load_template(self.path)
+
+    self.assertEqual(template.render({"Title": "T", "Content": "x"}), "<nav><a>T</a></nav><main>x</main>")
+    self.assertEqual(template.includes, {self.path: [nav], nav: [links], links: []})
+
+    self.write("<b>{{ Title }}</b>", 2000, "partials/links.html")
+    self.assertEqual(load_template(self.path).render({"Title": "T", "Content": "x"}), "<nav><b>T</b></nav><main>x</main>")
+
+  def test_include_cycle(self):
+    self.write("{{> template.html }}", 1000)
+
+    with self.assertRaises(ValueError):
+      load_template(self.path)
+
+if __name__ == "__main__":
+  unittest.main()
@@ -1,6 +1,9 @@
+import random
 import unittest
 
-from textnode import TextNode, TextType, text_node_to_html_node, text_to_textnodes, extract_markdown_images, extract_markdown_links, split_nodes_image, split_nodes_link, split_nodes_delimiter
+from htmlnode import LeafSpanNode
+
+from textnode import TextNode, TextSpan, TextType, text_node_to_html_node, text_to_textnodes, extract_markdown_images, extract_markdown_links, split_nodes_image, split_nodes_link, split_nodes_delimiter
 
 class TestTextNode(unittest.TestCase):
   def test_eq(self):
@@ -24,6 +27,10 @@ class TestTextNode(unittest.TestCase):
     self.assertEqual(node.text, text)
     self.assertEqual(node.text_type, text_type)
 
+  def test_no_instance_dict(self):
+    node = TextNode("This is a text node", TextType.TEXT)
+    self.assertFalse(hasattr(node, "__dict__"))
+
   def test_repr(self):
     text = "This is a text node"
     text_type = TextType.TEXT
@@ -31,6 +38,49 @@ class TestTextNode(unittest.TestCase):
     printed_value = node.__repr__()
     self.assertEqual(f"TextNode({text}, {text_type}, None)", printed_value)
 
+class TestTextSpan(unittest.TestCase):
+  def test_text_is_sliced_lazily(self):
+    source = "Hello **world**"
+    span = TextSpan(source, 8, 13, TextType.BOLD)
+
+    self.assertIs(span.source, source)
+    self.assertEqual(span.text, "world")
+    self.assertEqual(span, TextNode("world", TextType.BOLD))
+    self.assertEqual(repr(span), "TextNode(world, TextType.BOLD, None)")
+    self.assertFalse(hasattr(span, "__dict__"))
+
+  def test_set_text(self):
+    span = TextSpan("Hello world", 0, 5, TextType.TEXT)
+    span.text = "Bye"
+
+    self.assertEqual((span.text, span.start, span.end), ("Bye", 0, 3))
+
+  def test_splitters_keep_spans(self):
+    source = "This is **text** with an _italic_ word, an ![image](a.png) and a [link](https://boot.dev)"
+    nodes = [TextSpan(source, 0, len(source), TextType.TEXT)]
+    nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
+    nodes = split_nodes_delimiter(nodes, "_", TextType.ITALIC)
+    nodes = split_nodes_image(nodes)
+    nodes = split_nodes_link(nodes)
+
+    self.assertTrue(all(isinstance(node, TextSpan) and node.source is source for node in nodes))
+    self.assertEqual(nodes, text_to_textnodes(source))
+
+  def test_to_html(self):
+    span = TextSpan("see [docs](https://boot.dev)", 5, 9, TextType.LINKS, "https://boot.dev")
+    self.assertEqual(text_node_to_html_node(span).to_html(), '<a href="https://boot.dev">docs</a>')
+
+  def test_text_to_textnodes_spans(self):
+    source = "Some **bold** and a [link](a) then ![alt](b.png) and `code`"
+    nodes = text_to_textnodes(source, spans=True)
+
+    self.assertEqual(nodes, text_to_textnodes(source))
+    self.assertTrue(all(isinstance(node, TextSpan) and node.source is source for node in nodes))
+    html_nodes = [text_node_to_html_node(node) for node in nodes]
+    self.assertIsInstance(html_nodes[1], LeafSpanNode)
+    self.assertIs(html_nodes[1].source, source)
+    self.assertEqual("".join(node.to_html() for node in html_nodes), "".join(text_node_to_html_node(node).to_html() for node in text_to_textnodes(source)))
+
 class TestTextNodeToHTMLNode(unittest.TestCase):
   def test_bold_text_type(self):
     text = "Bold text"
@@ -41,6 +91,14 @@ class TestTextNodeToHTMLNode(unittest.TestCase):
     expected_html = "<b>Bold text</b>"
     self.assertEqual(html_node.to_html(), expected_html)
 
+def split_pipeline(text):
+  nodes = [TextNode(text, TextType.TEXT)]
+  nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
+  nodes = split_nodes_delimiter(nodes, "_", TextType.ITALIC)
+  nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)
+  nodes = split_nodes_image(nodes)
+  return split_nodes_link(nodes)
+
 class TestTextToTextNodes(unittest.TestCase):
   def test_normal_text(self):
     text = "Hello world"
@@ -117,6 +175,51 @@ class TestTextToTextNodes(unittest.TestCase):
 
     self.assertEqual(nodes, expected_nodes)
 
+  def test_matches_split_pipeline(self):
+    texts = [
+      "",
+      "plain text",
+      "**bold** at the start and `code` at the end `x`",
+      "empty ****bold**** sections",
+      "![first](a.png)![second](b.png) trailing",
+      "**bold**![image](a.png)",
+      "[link](a) then ![image](b.png) then [link](c)",
+      "![image](a.png)[link](b)[link](c) text",
+      "text [one](a) and [two](b)",
+      "multi\nline **bold\ntext** and _more_",
+      "[x ![c](d.png) and [a](b ![e](f.png)",
+      "**[a** b](c) and _[d_ e](f)",
+      "!![image](a.png)![](b.png)",
+      "***bold*** [x](y) *",
+    ]
+
+    for text in texts:
+      self.assertEqual(text_to_textnodes(text), split_pipeline(text), text)
+
+  def test_image_after_stray_bracket(self):
+    self.assertEqual(text_to_textnodes("Type list[int], see ![diagram](/images/d.png)"), [
+      TextNode("Type list[int], see ", TextType.TEXT),
+      TextNode("diagram", TextType.IMAGES, "/images/d.png"),
+    ])
+
+  def test_matches_split_pipeline_on_random_text(self):
+    rng = random.Random(0)
+    pieces = ["a", " ", "*", "**", "***", "_", "`", "[", "]", "(", ")", "!", "![", "](", "\n", "x.png", "[a](b)", "![c](d)"]
+    for _ in range(20000):
+      text = "".join(rng.choice(pieces) for _ in range(rng.randint(0, 14)))
+      try:
+        expected = split_pipeline(text)
+      except ValueError:
+        with self.assertRaises(ValueError, msg=text):
+          text_to_textnodes(text)
+        continue
+      self.assertEqual(text_to_textnodes(text), expected, text)
+
+  def test_unclosed_delimiter(self):
+    for text in ["Hello **world", "Hello _world", "Hello `world"]:
+      with self.assertRaises(ValueError):
+        text_to_textnodes(text)
+
 class TestExtractMarkdownImages(unittest.TestCase):
   def test_one_image(self):
     text = "This is text with a ![rick roll](https://i.imgur.com/aKaOqIh.gif)"
@@ -219,6 +322,15 @@ class TestSplitNodesImage(unittest.TestCase):
 
 
 class TestSplitNodesLink(unittest.TestCase):
+  def test_many_links(self):
+    text = " ".join(f"[link {i}](https://example.com/{i})" for i in range(1000)) + " end"
+    new_nodes = split_nodes_link([TextNode(text, TextType.TEXT)])
+
+    self.assertEqual(len(new_nodes), 2001)
+    self.assertEqual(new_nodes[0], TextNode("", TextType.TEXT))
+    self.assertEqual(new_nodes[1999], TextNode("link 999", TextType.LINKS, "https://example.com/999"))
+    self.assertEqual(new_nodes[2000], TextNode(" end", TextType.TEXT))
+
   def test_no_links(self):
     node = TextNode(
       "This is text with no links",
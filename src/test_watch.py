@@ -0,0 +1,47 @@
+import os
+import tempfile
+import unittest
+
+from watch import snapshot, changed_paths, wait_for_changes
+
+class TestWatch(unittest.TestCase):
+  def setUp(self):
+    self.tmp = tempfile.TemporaryDirectory()
+    self.content = os.path.join(self.tmp.name, "content")
+    self.template = self.write("template.html", "{{ Content }}")
+    self.page = self.write("content/blog/index.md", "# Blog")
+
+  def tearDown(self):
+    self.tmp.cleanup()
+
+  def write(self, name, content):
+    path = os.path.join(self.tmp.name, name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as file:
+      file.write(content)
+    return path
+
+  def test_snapshot(self):
+    state = snapshot([self.content, self.template])
+    self.assertEqual(sorted(state), sorted([self.page, self.template]))
+
+  def test_changed_paths(self):
+    before = snapshot([self.content, self.template])
+    new_page = self.write("content/new.md", "# New")
+    self.write("content/blog/index.md", "# Blog, edited")
+    os.remove(self.template)
+    after = snapshot([self.content, self.template])
+
+    self.assertEqual(changed_paths(before, after), sorted([new_page, self.page, self.template]))
+    self.assertEqual(changed_paths(after, after), [])
+
+  def test_wait_for_changes(self):
+    before = snapshot([self.content, self.template])
+    self.write("template.html", "<main>{{ Content }}</main>")
+    changed, current = wait_for_changes([self.content, self.template], before, 0.01, 0.01)
+
+    self.assertEqual(changed, [self.template])
+    self.assertEqual(current, snapshot([self.content, self.template]))
+
+if __name__ == "__main__":
+  unittest.main()
@@ -1,6 +1,6 @@
 import re
 from enum import Enum
-from htmlnode import LeafNode
+from htmlnode import LeafNode, LeafSpanNode
 
 class TextType(Enum):
   TEXT = "normal"
@@ -11,6 +11,8 @@ class TextType(Enum):
   IMAGES = "images"
 
 class TextNode():
+  __slots__ = ("text", "text_type", "url")
+
   def __init__(self, text: str, text_type: TextType, url: str=None):
     self.text = text
     self.text_type = text_type
@@ -22,7 +24,53 @@ class TextNode():
   def __eq__(self, value: object) -> bool:
     return self.text == value.text and self.text_type == value.text_type and self.url == value.url
 
+class TextSpan(TextNode):
+  # A TextNode whose text is the [start, end) range of a source string. Splitting a span
+  # only creates new offsets, the substring is copied when text is first read
+  __slots__ = ("source", "start", "end")
+
+  def __init__(self, source: str, start: int, end: int, text_type: TextType, url: str=None):
+    self.source = source
+    self.start = start
+    self.end = end
+    self.text_type = text_type
+    self.url = url
+
+  @property
+  def text(self):
+    return self.source[self.start:self.end]
+
+  @text.setter
+  def text(self, value):
+    self.source = value
+    self.start = 0
+    self.end = len(value)
+
+def text_node_bounds(node):
+  if isinstance(node, TextSpan):
+    return node.source, node.start, node.end
+  return node.text, 0, len(node.text)
+
+def text_node_slice(node, source, start, end, text_type, url=None):
+  # Spans split into spans, plain nodes keep copying substrings, which is cheaper for
+  # the short texts inline markdown usually has
+  if isinstance(node, TextSpan):
+    return TextSpan(source, start, end, text_type, url)
+  return TextNode(source[start:end], text_type, url)
+
+SPAN_TAGS = {TextType.TEXT: None, TextType.BOLD: "b", TextType.ITALIC: "i", TextType.CODE: "code", TextType.LINKS: "a"}
+
+def text_span_to_html_node(span):
+  # The leaf keeps the span's offsets, so its text is only sliced when it is written out.
+  # Image alt text is an attribute and is sliced right away.
+  if span.text_type not in SPAN_TAGS:
+    return text_node_to_html_node(TextNode(span.text, span.text_type, span.url))
+  props = {"href": span.url} if span.text_type == TextType.LINKS else None
+  return LeafSpanNode(SPAN_TAGS[span.text_type], span.source, span.start, span.end, props)
+
 def text_node_to_html_node(text_node):
+    if isinstance(text_node, TextSpan):
+        return text_span_to_html_node(text_node)
     if text_node.text_type == TextType.BOLD:
         return LeafNode("b", text_node.text)
     elif text_node.text_type == TextType.ITALIC:
@@ -38,50 +86,120 @@ def text_node_to_html_node(text_node):
     else:
         raise ValueError("Invalid TextType")
 
-def text_to_textnodes(text):
-  nodes = [TextNode(text, TextType.TEXT)]
-  nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
-  nodes = split_nodes_delimiter(nodes, "_", TextType.ITALIC)
-  nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)
-  nodes = split_nodes_image(nodes)
-  nodes = split_nodes_link(nodes)
+DELIMITER_TYPES = {"**": TextType.BOLD, "_": TextType.ITALIC, "`": TextType.CODE}
+
+def text_to_textnodes(text, spans=False):
+  # One left-to-right scan that produces exactly the nodes of split_nodes_delimiter for
+  # **, _ and ` followed by split_nodes_image and split_nodes_link. Those split ** over
+  # the whole text, _ only outside bold and ` only outside bold and italic, so inside a
+  # section only its closing delimiter matters and an earlier split's delimiter in
+  # front of it means the section was never closed. Images and links are matched in
+  # the plain runs between sections, bounded by the next delimiter.
+  # The scan keeps the next position of each delimiter and of "[" and only looks further
+  # ahead for the ones it has passed, so every lookup is a plain find. It records
+  # offsets and the nodes are made from them in one go at the end. With spans, no text
+  # is copied at all and the nodes are TextSpans into text.
+  tokens = []
+  length = len(text)
+  scan = 0
+  # What of the current plain run has been turned into tokens, and whether that ended on a link
+  position = 0
+  linked = False
+  bold = find_next(text, "**", 0)
+  italic = find_next(text, "_", 0)
+  code = find_next(text, "`", 0)
+  bracket = find_next(text, "[", 0)
+  while True:
+    run_end = min(bold, italic, code)
+    if bracket < run_end:
+      match = None
+      is_image = bracket > scan and text[bracket - 1] == "!"
+      if is_image:
+        match = IMAGE_PATTERN.match(text, bracket - 1, run_end)
+      if match == None:
+        is_image = False
+        match = LINK_PATTERN.match(text, bracket, run_end)
+      if match == None:
+        bracket = find_next(text, "[", bracket + 1)
+        continue
+
+      match_start, match_end = match.span()
+      if not is_image and text.find("![", match_start, match_end) != -1:
+        # Images are split out before links, so a link that would swallow the start of an
+        # image gives way to it and only the links in front of the image are kept
+        image = IMAGE_PATTERN.search(text, match_start, run_end)
+        if image != None and image.start() < match_end:
+          for link in LINK_PATTERN.finditer(text, position, image.start()):
+            tokens.append((position, link.start(), TextType.TEXT, None))
+            tokens.append((link.start(1), link.end(1), TextType.LINKS, link.group(2)))
+            position = link.end()
+            linked = True
+          match = image
+          match_start, match_end = image.span()
+          is_image = True
+
+      if is_image:
+        # The text in front of an image is kept even when it is empty, unless a link ends there
+        if not linked or position < match_start:
+          tokens.append((position, match_start, TextType.TEXT, None))
+        tokens.append((match.start(1), match.end(1), TextType.IMAGES, match.group(2)))
+        linked = False
+      else:
+        tokens.append((position, match_start, TextType.TEXT, None))
+        tokens.append((match.start(1), match.end(1), TextType.LINKS, match.group(2)))
+        linked = True
+      scan = position = match_end
+      bracket = find_next(text, "[", scan)
+      continue
 
-  return nodes
+    if position < run_end:
+      tokens.append((position, run_end, TextType.TEXT, None))
+    if run_end == length:
+      break
+
+    delimiter = "**" if run_end == bold else "_" if run_end == italic else "`"
+    start = run_end + len(delimiter)
+    end = text.find(delimiter, start)
+    if end == -1 or (delimiter != "**" and text.find("**", start, end) != -1) or (delimiter == "`" and text.find("_", start, end) != -1):
+      raise ValueError("invalid markdown, formatted section not closed")
+    if start < end:
+      tokens.append((start, end, DELIMITER_TYPES[delimiter], None))
+    scan = position = end + len(delimiter)
+    linked = False
+    if bold < scan:
+      bold = find_next(text, "**", scan)
+    if italic < scan:
+      italic = find_next(text, "_", scan)
+    if code < scan:
+      code = find_next(text, "`", scan)
+    if bracket < scan:
+      bracket = find_next(text, "[", scan)
+
+  if spans:
+    return [TextSpan(text, start, end, text_type, url) for start, end, text_type, url in tokens]
+  return [TextNode(text[start:end], text_type, url) for start, end, text_type, url in tokens]
+
+def find_next(text, sub, start):
+  # Like find, but a missing sub is found at the end of the text, past everything else
+  index = text.find(sub, start)
+  return len(text) if index == -1 else index
+
+IMAGE_PATTERN = re.compile(r"\!\[(.*?)\]\((.*?)\)")
+LINK_PATTERN = re.compile(r"\[(.*?)\]\((.*?)\)")
 
 def extract_markdown_images(text):
-  return re.findall(r"\!\[(.*?)\]\((.*?)\)", text)
+  return IMAGE_PATTERN.findall(text)
 
 def extract_markdown_links(text):
-  return re.findall(r"\[(.*?)\]\((.*?)\)", text)
+  return LINK_PATTERN.findall(text)
 
 def split_nodes_image(old_nodes):
-  nodes = []
-
-  for node in old_nodes:
-    # Skip non-text nodes
-    if node.text_type != TextType.TEXT:
-      nodes.append(node)
-      continue
-
-    current_text = node.text
-    matches = extract_markdown_images(current_text)
-    if len(matches) == 0:
-      nodes.append(node)
-      continue
-
-    for match in extract_markdown_images(current_text):
-      alt_text, url = match
-      sections = current_text.split(f"![{alt_text}]({url})", 1)
-      nodes.append(TextNode(sections[0], TextType.TEXT))
-      nodes.append(TextNode(alt_text, TextType.IMAGES, url))
-      current_text = sections[1]
-
-    if current_text:
-      nodes.append(TextNode(current_text, TextType.TEXT))
-
-  return nodes
+  return split_nodes_pattern(old_nodes, IMAGE_PATTERN, TextType.IMAGES)
 
 def split_nodes_link(old_nodes):
+  return split_nodes_pattern(old_nodes, LINK_PATTERN, TextType.LINKS)
+
+def split_nodes_pattern(old_nodes, pattern, text_type):
   nodes = []
 
   for node in old_nodes:
@@ -90,21 +208,18 @@ def split_nodes_link(old_nodes):
       nodes.append(node)
       continue
 
-    current_text = node.text
-    matches = extract_markdown_links(current_text)
-    if len(matches) == 0:
-      nodes.append(node)
-      continue
-
-    for match in matches:
-      link_text, url = match
-      sections = current_text.split(f"[{link_text}]({url})", 1)
-      nodes.append(TextNode(sections[0], TextType.TEXT))
-      nodes.append(TextNode(link_text, TextType.LINKS, url))
-      current_text = sections[1]
+    # Scan the node's text in place and keep new nodes as offsets into the same source
+    source, start, end = text_node_bounds(node)
+    position = start
+    for match in pattern.finditer(source, start, end):
+      nodes.append(text_node_slice(node, source, position, match.start(), TextType.TEXT))
+      nodes.append(text_node_slice(node, source, match.start(1), match.end(1), text_type, match.group(2)))
+      position = match.end()
 
-    if current_text:
-      nodes.append(TextNode(current_text, TextType.TEXT))
+    if position == start:
+      nodes.append(node)
+    elif position < end:
+      nodes.append(text_node_slice(node, source, position, end, TextType.TEXT))
 
   return nodes
 
@@ -115,15 +230,23 @@ def split_nodes_delimiter(old_nodes, delimiter, text_type):
           new_nodes.append(old_node)
           continue
       split_nodes = []
-      sections = old_node.text.split(delimiter)
+      source, position, end = text_node_bounds(old_node)
+      sections = []
+      while True:
+          found = source.find(delimiter, position, end)
+          if found == -1:
+              break
+          sections.append((position, found))
+          position = found + len(delimiter)
+      sections.append((position, end))
       if len(sections) % 2 == 0:
           raise ValueError("invalid markdown, formatted section not closed")
-      for i in range(len(sections)):
-          if sections[i] == "":
+      for i, (section_start, section_end) in enumerate(sections):
+          if section_start == section_end:
               continue
           if i % 2 == 0:
-              split_nodes.append(TextNode(sections[i], TextType.TEXT))
+              split_nodes.append(text_node_slice(old_node, source, section_start, section_end, TextType.TEXT))
           else:
-              split_nodes.append(TextNode(sections[i], text_type))
+              split_nodes.append(text_node_slice(old_node, source, section_start, section_end, text_type))
       new_nodes.extend(split_nodes)
   return new_nodes
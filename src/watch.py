@@ -0,0 +1,47 @@
+import os
+import time
+
+def snapshot(paths):
+  state = {}
+  for path in paths:
+    if os.path.isfile(path):
+      stat = os.stat(path)
+      state[path] = (stat.st_size, stat.st_mtime_ns)
+      continue
+
+    for root, _, files in os.walk(path):
+      for name in files:
+        file_path = os.path.join(root, name)
+        try:
+          stat = os.stat(file_path)
+        except FileNotFoundError:
+          continue
+        state[file_path] = (stat.st_size, stat.st_mtime_ns)
+
+  return state
+
+def changed_paths(old_state, new_state):
+  return sorted(path for path in old_state.keys() | new_state.keys() if old_state.get(path) != new_state.get(path))
+
+def wait_for_changes(paths, previous, interval=0.2, debounce=0.1):
+  while True:
+    current = snapshot(paths)
+    changed = set(changed_paths(previous, current))
+    if changed:
+      break
+    time.sleep(interval)
+
+  # Editors and git write files in bursts, wait until the tree stops changing
+  while True:
+    time.sleep(debounce)
+    settled = snapshot(paths)
+    if settled == current:
+      return sorted(changed), current
+    changed.update(changed_paths(current, settled))
+    current = settled
+
+def watch(paths, on_change, interval=0.2, debounce=0.1):
+  previous = snapshot(paths)
+  while True:
+    changed, previous = wait_for_changes(paths, previous, interval, debounce)
+    on_change(changed)